@@ -7,22 +7,33 @@ import dotenv
 import os
 import ssl
 import platform
-import tarfile
-import zipfile
 import shutil
+import time
 from github import Github
-from .utils import dmgextractor, make_utils
+from .utils import (
+    bin_cache,
+    build_pool,
+    cmake_directives,
+    compiler_cache,
+    daily_builds,
+    dmgextractor,
+    download,
+    download_cache,
+    extract,
+    job_control,
+    logs,
+    make_utils,
+    mirrors,
+    process_output,
+    transport,
+    treecopy,
+    worktrees,
+)
 from abc import ABC, abstractmethod
-import stat
-import requests
+from contextlib import contextmanager
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler(), logging.FileHandler("buildbpy.log")],
-)
+# Logging is configured by the CLI entry point, see logs.configure_logging
 logger = logging.getLogger(__name__)
 
 dotenv.load_dotenv()
@@ -31,56 +42,25 @@ dotenv.load_dotenv()
 from abc import ABC, abstractmethod
 
 
-def del_readonly(action, name, exc):
-    os.chmod(name, stat.S_IWRITE)
-    os.remove(name)
-
+def fetch_latest_build_info(
+    catalog: daily_builds.DailyBuildCatalog, preferred_version=None
+):
+    """
+    Return the latest daily build for this platform from ``catalog``.
 
-def fetch_latest_build_info(http_client: httpx.Client, preferred_version=None):
-    url = "https://builder.blender.org/download/daily/?format=json&v=1"
+    The catalog downloads the listing once (and revalidates it by ETag
+    across runs), so repeated calls are a dictionary lookup.
+    """
     try:
-        response = http_client.get(url)
-        response.raise_for_status()
-        builds = response.json()
-
         arch = platform.machine().lower()
         system = platform.system().lower()
-
-        if system == "windows":
-            file_extension = "zip"
-        elif system == "darwin":
-            file_extension = "dmg"
-        elif system == "linux":
-            file_extension = "xz"
-
-        # print(f"builds \n{builds}")
+        file_extension = daily_builds.FILE_EXTENSIONS.get(system)
 
         print(f"filtering for arch = {arch} and system = {system}")
 
-        # Filter builds based on platform and architecture
-        filtered_builds = [
-            build
-            for build in builds
-            if build["platform"] == system
-            and build["architecture"] == arch
-            and build["file_extension"] == file_extension
-        ]
-
-        # Sort builds by version, descending
-        sorted_builds = sorted(
-            filtered_builds, key=lambda x: x["version"], reverse=True
-        )
-
-        # Select the build for the preferred version or the latest one
-        if preferred_version:
-            for build in sorted_builds:
-                if build["version"].startswith(preferred_version):
-                    print(f"found version build: \n{build}")
-                    return build
-
-        print(f"found build: \n{sorted_builds[0]}")
-
-        return sorted_builds[0] if sorted_builds else None
+        build = catalog.latest(system, arch, file_extension, preferred_version)
+        print(f"found build: \n{build}")
+        return build
 
     except httpx.HTTPError as e:
         # Handle HTTP errors
@@ -103,7 +83,13 @@ class BlenderDownloadError(Exception):
 class StrategyFactory(ABC):
     @abstractmethod
     def create_os_strategy(
-        self, os_type, version_strategy, root_dir, blender_repo_dir, http_client
+        self,
+        os_type,
+        version_strategy,
+        root_dir,
+        blender_repo_dir,
+        http_client,
+        daily_catalog=None,
     ):
         """
         Create and return an OS-specific strategy.
@@ -111,6 +97,7 @@ class StrategyFactory(ABC):
         :param os_type: Type of the operating system.
         :param version_strategy: The version cycle strategy to be used.
         :param http_client: The HTTP client for downloading tasks.
+        :param daily_catalog: The daily build listing, shared with the checkout strategy.
         :return: An instance of a subclass of OSStrategy.
         """
         pass
@@ -133,7 +120,13 @@ class StrategyFactory(ABC):
 # Concrete implementation of the strategy factory
 class ConcreteStrategyFactory(StrategyFactory):
     def create_os_strategy(
-        self, os_type, version_strategy, root_dir, blender_repo_dir, http_client
+        self,
+        os_type,
+        version_strategy,
+        root_dir,
+        blender_repo_dir,
+        http_client,
+        daily_catalog=None,
     ):
         """
         Create and return an OS-specific strategy based on the provided OS type.
@@ -141,19 +134,20 @@ class ConcreteStrategyFactory(StrategyFactory):
         :param os_type: Type of the operating system.
         :param version_strategy: The version cycle strategy to be used.
         :param http_client: The HTTP client for downloading tasks.
+        :param daily_catalog: The daily build listing, shared with the checkout strategy.
         :return: An instance of a subclass of OSStrategy specific to the given OS type.
         """
         if os_type == "Windows":
             return WindowsOSStrategy(
-                version_strategy, root_dir, blender_repo_dir, http_client
+                version_strategy, root_dir, blender_repo_dir, http_client, daily_catalog
             )
         elif os_type == "Linux":
             return LinuxOSStrategy(
-                version_strategy, root_dir, blender_repo_dir, http_client
+                version_strategy, root_dir, blender_repo_dir, http_client, daily_catalog
             )
         elif os_type == "Darwin":
             return MacOSStrategy(
-                version_strategy, root_dir, blender_repo_dir, http_client
+                version_strategy, root_dir, blender_repo_dir, http_client, daily_catalog
             )
         else:
             raise ValueError(f"Unsupported OS type: {os_type}")
@@ -220,13 +214,28 @@ class VersionCycleStrategy(ABC):
     def get_file_suffix(self) -> str:
         pass
 
+    def get_download_mirrors(self) -> list[str]:
+        """Download URL roots serving the same files, tried fastest first."""
+        return [self.get_download_url_root()]
+
 
 class ReleaseVersionCycleStrategy(VersionCycleStrategy):
+    MIRRORS = [
+        "https://mirrors.ocf.berkeley.edu/blender/release",
+        "https://download.blender.org/release",
+        "https://mirror.clarkson.edu/blender/release",
+        "https://ftp.nluug.nl/pub/graphics/blender/release",
+        "https://ftp.halifax.rwth-aachen.de/blender/release",
+    ]
+
     def get_svn_root(self):
         return f"https://svn.blender.org/svnroot/bf-blender/tags/blender-{self.major_version}-release/lib/"
 
     def get_download_url_root(self):
-        return f"https://mirrors.ocf.berkeley.edu/blender/release/Blender{self.major_version}"
+        return f"{self.MIRRORS[0]}/Blender{self.major_version}"
+
+    def get_download_mirrors(self):
+        return [f"{mirror}/Blender{self.major_version}" for mirror in self.MIRRORS]
 
     def get_download_url_suffix(self):
         return ""
@@ -266,12 +275,20 @@ class AlphaBetaVersionCycleStrategy(VersionCycleStrategy):
 
 
 class OSStrategy(ABC):
+    # Lines added to bpy_module.cmake for this platform
+    CMAKE_DIRECTIVES: list[str] = []
+    # Whether make accepts BUILD_DIR=... to build outside the default directory
+    BUILD_DIR_OVERRIDE = True
+    # Whether make can generate Ninja files, which enables the link and heavy compile pools
+    NINJA_GENERATOR = True
+
     def __init__(
         self,
         version_strategy: VersionCycleStrategy,
         root_dir: Path,
         blender_repo_dir: Path,
         http_client: httpx.Client,
+        daily_catalog: daily_builds.DailyBuildCatalog = None,
         preferred_version: str = None,
     ):
         self.blender_repo_dir = blender_repo_dir
@@ -279,19 +296,40 @@ class OSStrategy(ABC):
         self.lib_path: Path = None
         self.root_dir = root_dir
         self.bin_dir = self.root_dir / "blender-bin"
+        # Extracted tree of the current download inside bin_dir, set by extract()
+        self.extracted_dir: Path = None
         self.download_dir = self.root_dir / "downloads"
-        self.lib_dir = self.root_dir / "blender" / "lib"
+        self.lib_dir = self.blender_repo_dir / "lib"
         self.version_strategy = version_strategy
         self.http_client = http_client
         self.download_url = None
+        self.download_segments = 0
+        self.download_cache_quota = download_cache.DEFAULT_QUOTA_BYTES
+        # Members to extract from the Blender archive; None extracts everything
+        self.extract_filter = extract.MemberFilter.from_manifest(extract.STUB_MANIFEST)
+        self.xz_backend = "auto"
+        self.bin_cache_quota = bin_cache.DEFAULT_QUOTA_BYTES
         self.make_command = "make"
+        self.cmake_report: cmake_directives.DirectivesReport = None
+        self.compiler_cache: compiler_cache.CompilerCache = None
+        self.build_dir_overridden = False
+        self.job_plan: job_control.JobPlan = None
+        self.use_ninja = False
         if self.version_strategy.release_cycle == "release":
             self.download_filename = f"blender-{self.version_strategy.minor_version}{self.version_strategy.get_download_url_suffix()}-{self.get_system_type()}{self.get_arch()}{self.version_strategy.get_file_suffix()}.{self.get_file_ext()}"
             self.download_url = f"{self.version_strategy.get_download_url_root()}/{self.download_filename}"
+            self.download_urls = [
+                f"{root}/{self.download_filename}"
+                for root in self.version_strategy.get_download_mirrors()
+            ]
         else:
-            build_info = fetch_latest_build_info(http_client, preferred_version)
+            build_info = fetch_latest_build_info(
+                daily_catalog or daily_builds.DailyBuildCatalog(http_client),
+                preferred_version or self.version_strategy.minor_version,
+            )
             self.download_url = build_info["url"]
             self.download_filename = build_info["file_name"]
+            self.download_urls = [self.download_url]
 
     def setup_build_environment(self):
         # Checkout libraries if not present
@@ -312,33 +350,10 @@ class OSStrategy(ABC):
         """
         logger.info(f"Running command: {command} in {cwd}")
 
-        # Use Popen to stream output in real-time
-        process = subprocess.Popen(
-            command,
-            cwd=cwd,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,  # Line buffered
-            universal_newlines=True,
-        )
-
-        # Stream stdout and stderr
-        while True:
-            output = process.stdout.readline()
-            if output == "" and process.poll() is not None:
-                break
-            if output:
-                logger.info(output.strip())
-
-        # Get any remaining stderr
-        stderr = process.stderr.read()
-        if stderr:
-            logger.warning(stderr.strip())
+        # Drain stdout and stderr concurrently; the output goes to the log file in batches
+        return_code, stderr = process_output.run_streaming(command, cwd)
 
         # Check return code
-        return_code = process.wait()
         if return_code != 0:
             logger.error(f"Command failed with return code {return_code}")
             raise subprocess.CalledProcessError(return_code, command, "", stderr)
@@ -363,61 +378,207 @@ class OSStrategy(ABC):
     def get_file_ext(self):
         pass
 
-    @abstractmethod
-    def set_cmake_directives(self):
-        pass
+    def get_cmake_directives(self) -> list[str]:
+        directives = list(self.CMAKE_DIRECTIVES)
+        if self.compiler_cache is not None:
+            directives += self.compiler_cache.cmake_directives()
+        # The job pools only exist in Ninja files, Makefiles ignore them
+        if self.job_plan is not None and self.use_ninja:
+            directives += self.job_plan.cmake_directives()
+        return directives
+
+    def set_build_dir(self, build_dir: Path):
+        """Build in ``build_dir`` instead of make's default next to the sources."""
+        self.build_wheel_dir = build_dir / self.build_wheel_dir.relative_to(self.build_dir)
+        self.build_dir = build_dir
+        self.build_dir_overridden = True
+
+    def get_make_args(self) -> str:
+        # Pass the build directory with ninja too, so make cannot pick another default
+        if self.build_dir_overridden or self.use_ninja:
+            args = f' BUILD_DIR="{self.build_dir}"'
+        else:
+            args = ""
+        if self.use_ninja:
+            args += " ninja"
+        if self.job_plan is not None:
+            args += f" NPROCS={self.job_plan.compile_jobs}"
+        return args
+
+    def check_generator(self):
+        """
+        Match the generator to the CMake cache of the build directory.
 
-    def _prepare_bin_dir(self):
-        bin_dir = self.bin_dir
-        bin_dir.mkdir(parents=True, exist_ok=True)
+        A build directory configured for Ninja by an earlier ``--ninja`` run
+        keeps Ninja. When ``--ninja`` is requested for a directory configured
+        for Makefiles, or ninja is no longer installed, the cache is dropped
+        since CMake refuses to reconfigure with a different generator. Built
+        objects are kept, and the compiler cache makes the full rebuild cheap.
+        """
+        if not self.NINJA_GENERATOR:
+            return
+        cached = cmake_directives.cache_value(self.build_dir, "CMAKE_GENERATOR")
+        if cached == "Ninja" and not self.use_ninja and shutil.which("ninja") is not None:
+            logger.info(f"{self.build_dir} was configured for Ninja, keeping it")
+            self.use_ninja = True
+        generator = "Ninja" if self.use_ninja else "Unix Makefiles"
+        if cached and cached != generator:
+            logger.warning(
+                f"{self.build_dir} was configured for {cached}, reconfiguring for {generator}"
+            )
+            cmake_directives.reset_cache(self.build_dir)
 
-        # Empty and extract the bin directory
-        for file in bin_dir.glob("*"):
-            if file.is_file():
-                file.unlink()
-            else:
-                shutil.rmtree(file)
+    def set_cmake_directives(self) -> cmake_directives.DirectivesReport:
+        """
+        Write this platform's directives as one marked block in bpy_module.cmake.
+
+        The file is left untouched when the block is unchanged. Blender's
+        GNUmakefile still runs CMake on every make, but the cache stays the
+        same and nothing is rebuilt because of the directives.
+        """
+        cmake_file_path = (
+            self.blender_repo_dir / "build_files/cmake/config/bpy_module.cmake"
+        )
+        print(f"Setting CMake directives in {cmake_file_path}")
+        self.cmake_report = cmake_directives.apply_directives(
+            cmake_file_path,
+            self.get_cmake_directives(),
+            self.build_dir / "buildbpy_directives.json",
+            (self.build_dir / "CMakeCache.txt").exists(),
+        )
+        return self.cmake_report
+
+    def _extract_cached(self, extract_fn):
+        """
+        Point ``self.extracted_dir`` at the extracted tree of the current download.
+
+        Trees are kept per archive and extraction manifest under ``bin_dir``,
+        so a build that was extracted before is reused as is.
+
+        :param extract_fn: Called with an empty directory to extract the archive into.
+        """
+        fingerprint = (
+            self.extract_filter.fingerprint() if self.extract_filter is not None else "full"
+        )
+        cache = bin_cache.BinaryCache(self.bin_dir, self.bin_cache_quota)
+        self.extracted_dir = cache.fetch(
+            bin_cache.build_key(self.download_filename, fingerprint), extract_fn
+        )
+
+    def get_checksum_urls(self) -> list[str]:
+        """
+        URLs that may publish the SHA-256 of the archive.
 
-    def download_file(self) -> Path:
+        builder.blender.org publishes a ``.sha256`` file next to each build,
+        release mirrors publish one ``blender-<version>.sha256`` listing per release.
+        Every mirror is listed, so a mirror that lags or is down does not skip
+        verification of an archive fetched from another one.
+        """
+        urls = [f"{url}.sha256" for url in self.download_urls]
+        if self.version_strategy.release_cycle == "release":
+            urls += [
+                f"{root}/blender-{self.version_strategy.minor_version}.sha256"
+                for root in self.version_strategy.get_download_mirrors()
+            ]
+        return urls
+
+    def download_file(self, progress: download.ProgressCallback = None) -> Path:
+        """
+        Fetch the Blender archive through the download cache.
+
+        A URL that is already cached is revalidated with a conditional GET and
+        reused on 304. Otherwise the archive is fetched over
+        ``self.download_segments`` parallel Range requests (0 = auto-tune per
+        host, 1 = a single stream), resuming from any ``.part`` file, and
+        checked against the published SHA-256 before it enters the cache.
+
+        :param progress: Optional callback receiving (downloaded_bytes, total_bytes).
+        :return: Path to the cached archive.
+        """
         url = self.download_url
         download_dir = self.download_dir
         download_dir.mkdir(parents=True, exist_ok=True)
+        cache = download_cache.DownloadCache(
+            download_dir / "cache", self.download_cache_quota
+        )
+        if progress is None:
+            progress = download.print_progress(self.download_filename)
+
+        tuner = download.SegmentTuner(download_dir / "segments.json")
+
+        def fetch_from(mirror_url: str, download_path: Path) -> str:
+            print(f"Downloading Blender from {mirror_url}")
+            return download.tuned_download(
+                self.http_client,
+                mirror_url,
+                download_path,
+                self.download_segments,
+                tuner,
+                progress,
+            )
 
-        print(f"Downloading Blender from {url}")
-        response = self.http_client.get(url)
-        if response.status_code == 200:
-            download_path = download_dir / self.download_filename
-            with open(download_path, "wb") as file:
-                file.write(response.content)
-        else:
-            raise Exception(f"Failed to download Blender from {url}")
+        def fetch(download_path: Path) -> str:
+            digest = mirrors.mirrored_download(
+                self.http_client,
+                self.download_urls,
+                download_path,
+                fetch_from,
+                mirrors.MirrorSelector(download_dir / "mirrors.json"),
+            )
+            expected = download.fetch_expected_sha256(
+                self.http_client, self.get_checksum_urls(), self.download_filename
+            )
+            download.verify_sha256(download_path, digest, expected)
+            return digest
 
-        return download_path
+        try:
+            return cache.fetch(self.http_client, url, self.download_filename, fetch)
+        except (httpx.HTTPError, download.DownloadError) as e:
+            raise BlenderDownloadError(f"Failed to download Blender from {url}") from e
 
 
 class WindowsOSStrategy(OSStrategy):
+    CMAKE_DIRECTIVES = [
+        'set(WITH_CYCLES_CUDA_BINARIES ON CACHE BOOL "" FORCE)',
+        'set(WITH_AUDASPACE ON CACHE BOOL "" FORCE)',
+    ]
+    # make.bat derives its build directory from the generator and architecture
+    BUILD_DIR_OVERRIDE = False
+    # Keep MSBuild: make.bat's ninja option needs a Visual Studio developer shell
+    NINJA_GENERATOR = False
+
+    def get_make_args(self):
+        # make.bat has no NPROCS; MSBuild and Ninja pick their own parallelism
+        return ""
+
     def __init__(
         self,
         version_strategy: VersionCycleStrategy,
         root_dir: Path,
         blender_repo_dir: Path,
         http_client: httpx.Client,
+        daily_catalog: daily_builds.DailyBuildCatalog = None,
     ):
-        super().__init__(version_strategy, root_dir, blender_repo_dir, http_client)
+        super().__init__(
+            version_strategy, root_dir, blender_repo_dir, http_client, daily_catalog
+        )
         self.lib_path = f"{self.version_strategy.get_svn_root()}win64_vc15"
-        self.build_dir = self.root_dir / "build_windows_Bpy_x64_vc17_Release"
+        # make.bat builds next to the source tree
+        self.build_dir = (
+            self.blender_repo_dir.parent / "build_windows_Bpy_x64_vc17_Release"
+        )
         self.make_command = blender_repo_dir / "make.bat"
         self.make_command = "make.bat"
         self.build_wheel_dir = self.build_dir / "bin/Release"
 
     def get_blender_binary(self):
-        blender_dir = list(self.bin_dir.glob("blender*"))[0]
+        blender_dir = list(self.extracted_dir.glob("blender*"))[0]
         return blender_dir / f"blender.exe"
 
     def extract(self, downloaded_file: Path):
-        self._prepare_bin_dir()
-        with zipfile.ZipFile(downloaded_file, "r") as zip_ref:
-            zip_ref.extractall(self.bin_dir)
+        self._extract_cached(
+            lambda target: extract.extract_zip(downloaded_file, target, self.extract_filter)
+        )
 
     def get_system_type(self):
         system_type = (
@@ -434,20 +595,6 @@ class WindowsOSStrategy(OSStrategy):
     def get_file_ext(self):
         return "zip"
 
-    def set_cmake_directives(self):
-        cmake_file_path = (
-            self.blender_repo_dir / "build_files/cmake/config/bpy_module.cmake"
-        )
-        print(f"Setting CMake directives in {cmake_file_path}")
-        directives = [
-            'set(WITH_CYCLES_CUDA_BINARIES ON CACHE BOOL "" FORCE)',
-            'set(WITH_AUDASPACE ON CACHE BOOL "" FORCE)',
-        ]
-
-        with open(cmake_file_path, "a") as file:
-            for directive in directives:
-                file.write(f"{directive}\n")
-
     def run_command(self, command: str, cwd: Path):
         """
         Run a shell command on Windows with special handling for piped input.
@@ -461,26 +608,46 @@ class WindowsOSStrategy(OSStrategy):
 
 
 class MacOSStrategy(OSStrategy):
+    CMAKE_DIRECTIVES = [
+        'set(CMAKE_OSX_DEPLOYMENT_TARGET "13.0" CACHE STRING "" FORCE)',
+        'set(CMAKE_C_FLAGS "-mmacosx-version-min=13.0" CACHE STRING "" FORCE)',
+        'set(CMAKE_CXX_FLAGS "-mmacosx-version-min=13.0" CACHE STRING "" FORCE)',
+        'set(WITH_AUDASPACE ON CACHE BOOL "" FORCE)',
+        'set(WITH_CODEC_FFMPEG ON CACHE BOOL "" FORCE)',
+        'set(WITH_CODEC_SNDFILE ON CACHE BOOL "" FORCE)',
+        'set(WITH_COREAUDIO ON CACHE BOOL "" FORCE)',
+        'set(WITH_JACK ON CACHE BOOL "" FORCE)',
+        'set(WITH_OPENAL ON CACHE BOOL "" FORCE)',
+        'set(WITH_PULSEAUDIO ON CACHE BOOL "" FORCE)',
+        'set(WITH_SDL ON CACHE BOOL "" FORCE)',
+        'set(WITH_WASAPI ON CACHE BOOL "" FORCE)',
+    ]
+
     def __init__(
         self,
         version_strategy: VersionCycleStrategy,
         root_dir: Path,
         blender_repo_dir: Path,
         http_client: httpx.Client,
+        daily_catalog: daily_builds.DailyBuildCatalog = None,
     ):
-        super().__init__(version_strategy, root_dir, blender_repo_dir, http_client)
+        super().__init__(
+            version_strategy, root_dir, blender_repo_dir, http_client, daily_catalog
+        )
         self.lib_path = f"{self.version_strategy.get_svn_root()}macos"
-        self.build_dir = self.root_dir / "build_darwin_bpy"
+        self.build_dir = self.blender_repo_dir.parent / "build_darwin_bpy"
         self.build_wheel_dir = self.build_dir / "bin"
         self.make_command = "make"
 
     def get_blender_binary(self):
-        return self.bin_dir / f"Blender.app/Contents/MacOS/Blender"
+        return self.extracted_dir / f"Blender.app/Contents/MacOS/Blender"
 
     def extract(self, downloaded_file: Path):
-        self._prepare_bin_dir()
-        with dmgextractor.DMGExtractor(downloaded_file) as extractor:
-            extractor.extractall(self.bin_dir)
+        def extract_dmg(target: Path):
+            with dmgextractor.DMGExtractor(downloaded_file) as extractor:
+                extractor.extractall(target, self.extract_filter)
+
+        self._extract_cached(extract_dmg)
 
     def get_system_type(self):
         system_type = (
@@ -495,46 +662,38 @@ class MacOSStrategy(OSStrategy):
     def get_file_ext(self):
         return "dmg"
 
-    def set_cmake_directives(self):
-        cmake_file_path = (
-            self.blender_repo_dir / "build_files/cmake/config/bpy_module.cmake"
-        )
-        print(f"Setting CMake directives in {cmake_file_path}")
-        directives = [
-            'set(CMAKE_OSX_DEPLOYMENT_TARGET "13.0" CACHE STRING "" FORCE)',
-            'set(CMAKE_C_FLAGS "-mmacosx-version-min=13.0" CACHE STRING "" FORCE)',
-            'set(CMAKE_CXX_FLAGS "-mmacosx-version-min=13.0" CACHE STRING "" FORCE)',
-            'set(WITH_AUDASPACE ON CACHE BOOL "" FORCE)',
-            'set(WITH_CODEC_FFMPEG ON CACHE BOOL "" FORCE)',
-            'set(WITH_CODEC_SNDFILE ON CACHE BOOL "" FORCE)',
-            'set(WITH_COREAUDIO ON CACHE BOOL "" FORCE)',
-            'set(WITH_JACK ON CACHE BOOL "" FORCE)',
-            'set(WITH_OPENAL ON CACHE BOOL "" FORCE)',
-            'set(WITH_PULSEAUDIO ON CACHE BOOL "" FORCE)',
-            'set(WITH_SDL ON CACHE BOOL "" FORCE)',
-            'set(WITH_WASAPI ON CACHE BOOL "" FORCE)',
-        ]
-
-        with open(cmake_file_path, "a") as file:
-            for directive in directives:
-                file.write(f"{directive}\n")
-
     def run_svn_checkout(self):
         """Override the svn checkout command for MacOS"""
         pass
 
 
 class LinuxOSStrategy(OSStrategy):
+    CMAKE_DIRECTIVES = [
+        'set(WITH_CYCLES ON CACHE BOOL "" FORCE)',
+        'set(WITH_CYCLES_EMBREE OFF CACHE BOOL "" FORCE)',
+        'set(WITH_CYCLES_SYCL OFF CACHE BOOL "" FORCE)',
+        'set(WITH_CYCLES_DEVICE_ONEAPI OFF CACHE BOOL "" FORCE)',
+        'set(WITH_CYCLES_ONEAPI_BINARIES OFF CACHE BOOL "" FORCE)',
+        "unset(EMBREE_ROOT_DIR CACHE)",
+        "unset(SYCL_ROOT_DIR CACHE)",
+        "unset(CYCLES_SYCL CACHE)",
+        'set(WITH_AUDASPACE ON CACHE BOOL "" FORCE)',
+        'set(WITH_CYCLES_OSL OFF CACHE BOOL "" FORCE)',
+    ]
+
     def __init__(
         self,
         version_strategy: VersionCycleStrategy,
         root_dir: Path,
         blender_repo_dir: Path,
         http_client: httpx.Client,
+        daily_catalog: daily_builds.DailyBuildCatalog = None,
     ):
-        super().__init__(version_strategy, root_dir, blender_repo_dir, http_client)
+        super().__init__(
+            version_strategy, root_dir, blender_repo_dir, http_client, daily_catalog
+        )
         self.lib_path = f"{self.version_strategy.get_svn_root()}linux_x86_64_glibc_228"
-        self.build_dir = self.root_dir / "build_linux_bpy"
+        self.build_dir = self.blender_repo_dir.parent / "build_linux_bpy"
         self.build_wheel_dir = self.build_dir / "bin"
         self.make_command = "make"
 
@@ -550,13 +709,15 @@ class LinuxOSStrategy(OSStrategy):
         self.run_command(f"{self.make_command} update", self.blender_repo_dir)
 
     def get_blender_binary(self):
-        blender_dir = list(self.bin_dir.glob("blender*"))[0]
+        blender_dir = list(self.extracted_dir.glob("blender*"))[0]
         return blender_dir / f"blender"
 
     def extract(self, downloaded_file: Path):
-        self._prepare_bin_dir()
-        with tarfile.open(downloaded_file, "r:xz") as tar:
-            tar.extractall(self.bin_dir)
+        self._extract_cached(
+            lambda target: extract.extract_tar(
+                downloaded_file, target, self.extract_filter, self.xz_backend
+            )
+        )
 
     def run_svn_checkout(self):
         """Override the svn checkout command for Linux"""
@@ -579,90 +740,142 @@ class LinuxOSStrategy(OSStrategy):
     def get_file_ext(self):
         return "tar.xz"
 
-    def set_cmake_directives(self):
-        cmake_file_path = (
-            self.blender_repo_dir / "build_files/cmake/config/bpy_module.cmake"
-        )
-        print(f"Setting CMake directives in {cmake_file_path}")
-        directives = [
-            'set(WITH_CYCLES ON CACHE BOOL "" FORCE)',
-            'set(WITH_CYCLES_EMBREE OFF CACHE BOOL "" FORCE)',
-            'set(WITH_CYCLES_SYCL OFF CACHE BOOL "" FORCE)',
-            'set(WITH_CYCLES_DEVICE_ONEAPI OFF CACHE BOOL "" FORCE)',
-            'set(WITH_CYCLES_ONEAPI_BINARIES OFF CACHE BOOL "" FORCE)',
-            "unset(EMBREE_ROOT_DIR CACHE)",
-            "unset(SYCL_ROOT_DIR CACHE)",
-            "unset(CYCLES_SYCL CACHE)",
-            'set(WITH_AUDASPACE ON CACHE BOOL "" FORCE)',
-            'set(WITH_CYCLES_OSL OFF CACHE BOOL "" FORCE)',
-        ]
-
-        with open(cmake_file_path, "a") as file:
-            for directive in directives:
-                file.write(f"{directive}\n")
 
-    def run_command(self, command: str, cwd: Path):
+class CheckoutStrategy(ABC):
+    # git_repo = "https://github.com/blender/blender.git"
+    GIT_REPO = "https://projects.blender.org/blender/blender.git"
+    CLONE_FILTERS = ("blob:none", "tree:0", "")
+
+    def __init__(
+        self,
+        blender_repo_dir: Path,
+        http_client: httpx.Client = None,
+        clone_filter: str = "blob:none",
+        fetch_depth: int = 0,
+    ):
         """
-        Run a shell command with default behavior.
-        :param command: The command to run.
-        :param cwd: The working directory for the command.
+        :param clone_filter: Partial clone filter for a new repository
+            (``blob:none`` fetches file contents on checkout, ``tree:0`` also
+            trees, ``""`` makes a full clone). Existing clones keep their setup.
+        :param fetch_depth: History depth of the target fetch, 0 for all of it.
         """
-        logger.info(f"Running command: {command} in {cwd}")
-
-        # Use Popen to stream output in real-time
-        process = subprocess.Popen(
-            command,
-            cwd=cwd,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+        if clone_filter not in self.CLONE_FILTERS:
+            raise ValueError(f"Unknown clone filter: {clone_filter}")
+        self.blender_repo_dir = blender_repo_dir
+        self.http_client = http_client
+        self.clone_filter = clone_filter
+        self.fetch_depth = fetch_depth
+        # Files rewritten by the last checkout, None after a fresh checkout
+        self.files_changed = None
+        if not (blender_repo_dir / ".git").exists():
+            self.init_repository()
+
+    def run_git(self, *args: str, env: dict = None) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            ["git", *args],
+            cwd=self.blender_repo_dir,
+            capture_output=True,
             text=True,
-            bufsize=1,  # Line buffered
-            universal_newlines=True,
+            env={**os.environ, **env} if env else None,
         )
 
-        # Stream stdout and stderr
-        while True:
-            output = process.stdout.readline()
-            if output == "" and process.poll() is not None:
-                break
-            if output:
-                logger.info(output.strip())
+    def init_repository(self):
+        """
+        Create an empty repository pointing at the Blender remote.
 
-        # Get any remaining stderr
-        stderr = process.stderr.read()
-        if stderr:
-            logger.warning(stderr.strip())
+        Nothing is downloaded here; the first target fetch brings in only
+        what the build needs. With a clone filter the remote is set up as a
+        promisor so every later fetch, including the lazy blob fetches of a
+        checkout, uses the same filter.
+        """
+        self.blender_repo_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Initialising Blender repository in {self.blender_repo_dir}")
+        self.run_git("init")
+        self.run_git("remote", "add", "origin", self.GIT_REPO)
+        if self.clone_filter:
+            self.run_git("config", "remote.origin.promisor", "true")
+            self.run_git("config", "remote.origin.partialclonefilter", self.clone_filter)
+
+    def has_revision(self, revision: str) -> bool:
+        if revision.startswith("refs/"):
+            return self.run_git("show-ref", "-q", "--verify", revision).returncode == 0
+        # A partial clone would otherwise fetch a missing commit on its own (git 2.44+)
+        result = self.run_git(
+            "rev-parse",
+            "-q",
+            "--verify",
+            f"{revision}^{{commit}}",
+            env={"GIT_NO_LAZY_FETCH": "1"},
+        )
+        return result.returncode == 0
 
-        # Check return code
-        return_code = process.wait()
-        if return_code != 0:
-            logger.error(f"Command failed with return code {return_code}")
-            raise subprocess.CalledProcessError(return_code, command, "", stderr)
+    def fetch_target(self, refspec: str, revision: str):
+        """
+        Make ``revision`` available locally with one fetch of ``refspec``.
 
+        Nothing is fetched when the revision is already present. Servers
+        that refuse to serve ``refspec`` directly (e.g. an abbreviated
+        commit hash) get one fallback fetch of the remote branches.
+        """
+        if self.has_revision(revision):
+            logger.info(f"{revision} is already present, skipping fetch")
+            return
 
-class CheckoutStrategy(ABC):
-    def __init__(self, blender_repo_dir: Path, http_client: httpx.Client = None):
-        self.blender_repo_dir = blender_repo_dir
-        self.http_client = http_client
-        if not blender_repo_dir.exists():
-            root_dir = blender_repo_dir.parent
-            # make the root_dir if it doesn't exist
-            root_dir.mkdir(parents=True, exist_ok=True)
-            # git_repo = "https://github.com/blender/blender.git"
-
-            git_repo = "https://projects.blender.org/blender/blender.git"
-
-            subprocess.run(
-                [
-                    "git",
-                    "clone",
-                    "--recursive",
-                    git_repo,
-                ],
-                cwd=root_dir,
+        depth = [f"--depth={self.fetch_depth}"] if self.fetch_depth else []
+        logger.info(f"Fetching {refspec} from origin")
+        result = self.run_git("fetch", "--no-tags", *depth, "origin", refspec)
+        if result.returncode != 0:
+            logger.warning(
+                f"Fetching {refspec} failed ({result.stderr.strip()}), fetching origin"
+            )
+            self.run_git("fetch", *depth, "origin")
+        if not self.has_revision(revision):
+            raise Exception(f"Could not fetch {revision} from origin")
+
+    def target(self, id: str) -> tuple[str, str]:
+        """Refspec to fetch and revision to check out for ``id``."""
+        return id, id
+
+    def fetch(self, id: str = None):
+        self.fetch_target(*self.target(id))
+
+    def worktree_name(self, id: str) -> str:
+        """Worktree to build ``id`` in; builds sharing one reuse each other's objects."""
+        return "commits"
+
+    def switch_to(self, revision: str) -> int:
+        """
+        Check out ``revision`` straight from the current HEAD.
+
+        Git only rewrites files that differ between the two trees (plus
+        local modifications, which are discarded), so unchanged sources
+        keep their mtimes and the next make stays incremental.
+
+        :return: Number of files that differ between the old HEAD and ``revision``.
+        """
+        head = self.run_git("rev-parse", "-q", "--verify", "HEAD").stdout.strip()
+        local_changes = self.run_git(
+            "status", "--porcelain", "--untracked-files=no"
+        ).stdout.splitlines()
+        changed = None
+        if head:
+            diff = self.run_git("diff", "--name-only", head, revision)
+            if diff.returncode == 0:
+                changed = len(diff.stdout.splitlines())
+
+        result = self.run_git("checkout", "--detach", "-f", revision)
+        if result.returncode != 0:
+            raise Exception(f"Failed to checkout {revision}: {result.stderr}")
+
+        if changed is None:
+            logger.info(f"Checked out {revision} into a fresh working tree")
+        else:
+            logger.info(
+                f"Checked out {revision}: {changed} files changed since {head[:12]}, "
+                f"{len(local_changes)} local modifications discarded"
             )
-        subprocess.run(["git", "fetch", "--all"], cwd=blender_repo_dir)
+        self.files_changed = changed
+        return changed
 
     @abstractmethod
     def checkout(self, id: str):
@@ -679,27 +892,13 @@ class CheckoutStrategy(ABC):
 
 class TagCheckoutStrategy(CheckoutStrategy):
     def checkout(self, id):
-        # Reset to origin/main and clean the repo
-        subprocess.run(["git", "fetch", "origin"], cwd=self.blender_repo_dir)
-        subprocess.run(
-            ["git", "reset", "--hard", "origin/main"], cwd=self.blender_repo_dir
-        )
-        subprocess.run(["git", "clean", "-fd"], cwd=self.blender_repo_dir)
-
-        # Fetch tags explicitly
-        print(f"Fetching tags and checking out {id}")
-        subprocess.run(["git", "fetch", "--tags"], cwd=self.blender_repo_dir)
-
-        # Checkout the specific tag
-        result = subprocess.run(
-            ["git", "checkout", f"tags/{id}", "-f"],
-            cwd=self.blender_repo_dir,
-            capture_output=True,
-            text=True,
-        )
+        # Fetch only the requested tag
+        print(f"Fetching tag and checking out {id}")
+        self.fetch(id)
 
-        if result.returncode != 0:
-            raise Exception(f"Failed to checkout tag {id}: {result.stderr}")
+        # Go straight to the tag, discarding local changes (e.g. appended CMake directives)
+        self.switch_to(f"tags/{id}")
+        subprocess.run(["git", "clean", "-fd"], cwd=self.blender_repo_dir)
 
         # Verify we're on the right tag
         result = subprocess.run(
@@ -715,6 +914,13 @@ class TagCheckoutStrategy(CheckoutStrategy):
         else:
             raise Exception(f"Failed to verify tag checkout: {result.stderr}")
 
+    def target(self, id):
+        return f"refs/tags/{id}:refs/tags/{id}", f"refs/tags/{id}"
+
+    def worktree_name(self, id):
+        # One worktree per release series, e.g. v4.2.1 builds in 4.2
+        return ".".join(id.replace("v", "").split(".")[:2])
+
     def set_version(self, commit_hash: str = None, tag: str = None):
         # parse a tag in the format of "v4.3.2" in to major_version 4.3 and minor_version 4.3.2 first remove the v and then split by .
         tag_version = tag.replace("v", "")
@@ -726,7 +932,8 @@ class TagCheckoutStrategy(CheckoutStrategy):
 
 class CommitCheckoutStrategy(CheckoutStrategy):
     def checkout(self, id):
-        subprocess.run(["git", "checkout", id], cwd=self.blender_repo_dir)
+        self.fetch(id)
+        self.switch_to(id)
 
     def set_version(self, commit_hash: str = None, tag: str = None):
         blender_source_dir = self.blender_repo_dir
@@ -744,9 +951,15 @@ class DailyCheckoutStrategy(CheckoutStrategy):
         blender_repo_dir: Path,
         http_client: httpx.Client = None,
         preferred_version: str = None,
+        clone_filter: str = "blob:none",
+        fetch_depth: int = 0,
+        daily_catalog: daily_builds.DailyBuildCatalog = None,
     ):
-        super().__init__(blender_repo_dir, http_client)
-        self.build_info = fetch_latest_build_info(self.http_client, preferred_version)
+        super().__init__(blender_repo_dir, http_client, clone_filter, fetch_depth)
+        self.build_info = fetch_latest_build_info(
+            daily_catalog or daily_builds.DailyBuildCatalog(http_client),
+            preferred_version,
+        )
 
     def set_version(self, commit_hash: str = None, tag: str = None):
         """Override to use fetch_latest_build_info"""
@@ -760,11 +973,18 @@ class DailyCheckoutStrategy(CheckoutStrategy):
         self.minor_version = self.build_info["version"]
         self.release_cycle = self.build_info["release_cycle"]
 
+    def target(self, id=None):
+        return self.build_info["hash"], self.build_info["hash"]
+
+    def worktree_name(self, id=None):
+        return ".".join(self.build_info["version"].split(".")[:2])
+
     def checkout(self, id=None):
         """Here we override the id and use the hash from self.build_info"""
         commit = self.build_info["hash"]
 
-        subprocess.run(["git", "checkout", commit], cwd=self.blender_repo_dir)
+        self.fetch(commit)
+        self.switch_to(commit)
 
 
 class BlenderBuilder:
@@ -777,8 +997,35 @@ class BlenderBuilder:
         factory: StrategyFactory,
         github_client: Github,
         root_dir: Path | None = None,
+        download_segments: int = 0,
+        download_cache_quota: int = download_cache.DEFAULT_QUOTA_BYTES,
+        extract_filter: extract.MemberFilter | None = extract.MemberFilter.from_manifest(
+            extract.STUB_MANIFEST
+        ),
+        xz_backend: str = "auto",
+        bin_cache_quota: int = bin_cache.DEFAULT_QUOTA_BYTES,
+        clone_filter: str = "blob:none",
+        fetch_depth: int = 0,
+        use_worktrees: bool = False,
+        compiler_launcher: str = "auto",
+        compiler_cache_size: int = compiler_cache.DEFAULT_SIZE_BYTES,
+        use_build_pool: bool = False,
+        build_pool_quota: int = build_pool.DEFAULT_QUOTA_BYTES,
+        jobs: int = 0,
+        ninja: bool = False,
     ):
         self.http_client = http_client
+        self.download_segments = download_segments
+        self.download_cache_quota = download_cache_quota
+        self.extract_filter = extract_filter
+        self.xz_backend = xz_backend
+        self.bin_cache_quota = bin_cache_quota
+        self.clone_filter = clone_filter
+        self.fetch_depth = fetch_depth
+        self.compiler_launcher = compiler_launcher
+        self.compiler_cache_size = compiler_cache_size
+        self.jobs = jobs
+        self.ninja = ninja
         self.factory = factory
         self.root_dir = root_dir if root_dir is not None else Path.home() / ".buildbpy"
         self.blender_repo_dir = (
@@ -786,18 +1033,38 @@ class BlenderBuilder:
             if blender_repo_dir is not None
             else self.root_dir / "blender"
         )
+        # Source tree of the current build: the repository or one of its worktrees
+        self.source_dir = self.blender_repo_dir
+        self.worktree_pool = (
+            worktrees.WorktreePool(self.blender_repo_dir, self.root_dir / "worktrees")
+            if use_worktrees
+            else None
+        )
+        self.worktree_name = None
+        self.build_pool = (
+            build_pool.BuildDirPool(
+                self.root_dir / "builds", self.blender_repo_dir, build_pool_quota
+            )
+            if use_build_pool
+            else None
+        )
         self.lib_dir = self.root_dir / "lib"
         self.bin_dir = self.root_dir / "blender-bin"
         self.download_dir = self.root_dir / "downloads"
-        self.python_api_dir = self.root_dir / "python_api"
         self.os_type = platform.system()
         self.version_strategy: VersionCycleStrategy = None
         self.os_strategy: OSStrategy = None
         self.checkout_strategy: CheckoutStrategy = None
         self.root_dir.mkdir(parents=True, exist_ok=True)
+        # One listing per run, shared by the checkout and OS strategies
+        self.daily_catalog = daily_builds.DailyBuildCatalog(
+            http_client, self.root_dir / "daily_builds.json"
+        )
         self.github_client = github_client
         self.blender_repo = github_client.get_repo("blender/blender")
         self.build_dir = None
+        # Settings and results of the last build, written to work_dir/build_report.json
+        self.build_report = {}
 
     def setup_strategies(
         self,
@@ -828,8 +1095,32 @@ class BlenderBuilder:
             major_version, minor_version, release_cycle, commit_hash
         )
         self.os_strategy = self.factory.create_os_strategy(
-            os_type, self.version_strategy, root_dir, blender_repo_dir, self.http_client
+            os_type,
+            self.version_strategy,
+            root_dir,
+            blender_repo_dir,
+            self.http_client,
+            self.daily_catalog,
+        )
+        self.os_strategy.download_segments = self.download_segments
+        self.os_strategy.download_cache_quota = self.download_cache_quota
+        self.os_strategy.extract_filter = self.extract_filter
+        self.os_strategy.xz_backend = self.xz_backend
+        self.os_strategy.bin_cache_quota = self.bin_cache_quota
+        self.os_strategy.compiler_cache = compiler_cache.CompilerCache.detect(
+            self.compiler_launcher,
+            self.root_dir / "compiler-cache",
+            self.compiler_cache_size,
+            self.root_dir,
         )
+        self.os_strategy.job_plan = job_control.plan_jobs(self.jobs)
+        if self.ninja:
+            if not self.os_strategy.NINJA_GENERATOR:
+                logger.warning("--ninja is not supported on this platform, keeping its generator")
+            elif shutil.which("ninja") is None:
+                logger.warning("ninja not found, building with Makefiles")
+            else:
+                self.os_strategy.use_ninja = True
 
     def get_valid_commits(self, commit_hash: str):
         commit = self.blender_repo.get_commit(commit_hash)
@@ -865,7 +1156,7 @@ class BlenderBuilder:
                 "--factory-startup",
                 "-noaudio",
                 "--python",
-                self.blender_repo_dir / "doc/python_api/sphinx_doc_gen.py",
+                self.source_dir / "doc/python_api/sphinx_doc_gen.py",
                 "--",
                 f"--output={self.python_api_dir}",
             ]
@@ -924,7 +1215,7 @@ class BlenderBuilder:
         # Build the wheel
         # subprocess.run(["pip", "install", "-U", "pip", "setuptools", "wheel"])
 
-        make_script = self.blender_repo_dir / "build_files/utils/make_bpy_wheel.py"
+        make_script = self.source_dir / "build_files/utils/make_bpy_wheel.py"
         print(f"Running python {make_script} {bin_path}")
         subprocess.run(["python", make_script, bin_path])
 
@@ -965,21 +1256,60 @@ class BlenderBuilder:
         # Checkout the correct state in the repo
         if selected_tag:
             logger.info(f"Using tag checkout strategy for {selected_tag}")
-            self.checkout_strategy = TagCheckoutStrategy(blender_repo_dir)
-            self.checkout_strategy.checkout(selected_tag)
+            self.checkout_strategy = TagCheckoutStrategy(
+                blender_repo_dir, None, self.clone_filter, self.fetch_depth
+            )
+            checkout_id = selected_tag
 
         elif commit:
             logger.info(f"Using commit checkout strategy for {commit}")
-            self.checkout_strategy = CommitCheckoutStrategy(blender_repo_dir)
-            self.checkout_strategy.checkout(commit)
+            self.checkout_strategy = CommitCheckoutStrategy(
+                blender_repo_dir, None, self.clone_filter, self.fetch_depth
+            )
+            checkout_id = commit
 
         elif daily_version or daily:
             logger.info(f"Using daily checkout strategy for {daily_version}")
             self.checkout_strategy = DailyCheckoutStrategy(
-                blender_repo_dir, self.http_client, daily_version
+                blender_repo_dir,
+                self.http_client,
+                daily_version,
+                self.clone_filter,
+                self.fetch_depth,
+                self.daily_catalog,
             )
             logger.info(f"Checking out daily version {daily_version}")
-            self.checkout_strategy.checkout()
+            checkout_id = None
+
+        with self.worktree(checkout_id) as blender_repo_dir:
+            return self.build_checkout(
+                blender_repo_dir,
+                checkout_id,
+                tag,
+                commit_hash,
+                clear_lib,
+                clear_cache,
+                publish,
+                install,
+                publish_repo,
+            )
+
+    def build_checkout(
+        self,
+        blender_repo_dir: Path,
+        checkout_id: str | None,
+        tag: str,
+        commit_hash: str,
+        clear_lib: bool,
+        clear_cache: bool,
+        publish: bool,
+        install: bool,
+        publish_repo: str,
+    ):
+        """Check out ``checkout_id`` in ``blender_repo_dir``, build it and make the wheel."""
+        selected_tag = tag
+        self.source_dir = blender_repo_dir
+        self.checkout_strategy.checkout(checkout_id)
 
         # Get Blender version and setup build
         logger.info("Setting version from checkout strategy")
@@ -1002,15 +1332,25 @@ class BlenderBuilder:
             self.root_dir,
             blender_repo_dir,
         )
+        build_commit = self.checkout_strategy.run_git("rev-parse", "HEAD").stdout.strip()
+        if self.build_pool is not None:
+            if self.os_strategy.BUILD_DIR_OVERRIDE:
+                self.os_strategy.set_build_dir(
+                    self.build_pool.acquire(
+                        self.major_version, build_commit, blender_repo_dir
+                    )
+                )
+            else:
+                logger.warning("The build directory pool is not supported on this platform")
         self.build_dir = self.os_strategy.build_dir
 
         # Clear cache and library if requested
         if clear_cache and self.build_dir.exists():
             logger.info(f"Clearing build directory {self.build_dir}")
-            shutil.rmtree(self.build_dir)
+            shutil.rmtree(self.build_dir, onerror=treecopy.del_readonly)
         if clear_lib and self.lib_dir.exists():
             logger.info(f"Clearing lib directory {self.lib_dir}")
-            shutil.rmtree(self.lib_dir)
+            shutil.rmtree(self.lib_dir, onerror=treecopy.del_readonly)
 
         make_command = self.os_strategy.make_command
         logger.info("Calling setup_build_environment")
@@ -1020,11 +1360,36 @@ class BlenderBuilder:
         logger.info("Generating stubs")
         self.generate_stubs(commit_hash)
         logger.info("Setting CMake directives")
+        self.os_strategy.check_generator()
         self.os_strategy.set_cmake_directives()
         os.chdir(blender_repo_dir)
 
-        logger.info(f"Running make command: {make_command} bpy")
-        self.os_strategy.run_command(f"{make_command} bpy", blender_repo_dir)
+        cache = self.os_strategy.compiler_cache
+        if cache is not None:
+            cache.prepare()
+        make_args = self.os_strategy.get_make_args()
+        logger.info(f"Running make command: {make_command} bpy{make_args}")
+        started = time.monotonic()
+        with job_control.MemoryGovernor() as governor:
+            self.os_strategy.run_command(f"{make_command} bpy{make_args}", blender_repo_dir)
+        compile_seconds = time.monotonic() - started
+        cache_stats = cache.log_report(compile_seconds) if cache is not None else None
+        if self.build_pool is not None and self.os_strategy.build_dir_overridden:
+            self.build_pool.record(self.build_dir, build_commit)
+        self.write_build_report(
+            {
+                "version": f"{self.minor_version}-{self.release_cycle}",
+                "commit": build_commit,
+                "build_dir": str(self.build_dir),
+                "files_changed": self.checkout_strategy.files_changed,
+                "cmake": self.os_strategy.cmake_report._asdict(),
+                "jobs": self.os_strategy.job_plan.as_dict(),
+                "ninja": self.os_strategy.use_ninja,
+                "memory_governor": governor.as_dict(),
+                "compiler_cache": cache_stats,
+                "compile_seconds": compile_seconds,
+            }
+        )
 
         # Build and install or publish the wheel
         wheel_path = self.os_strategy.build_wheel_dir
@@ -1035,6 +1400,53 @@ class BlenderBuilder:
 
         return True
 
+    @contextmanager
+    def worktree(self, checkout_id: str | None):
+        """
+        Hold the source tree for building ``checkout_id``.
+
+        With worktrees, the target is fetched into the shared repository and
+        its worktree is locked until the block exits, also on errors.
+        Otherwise this yields the repository itself.
+        """
+        if self.worktree_pool is None:
+            yield self.blender_repo_dir
+            return
+        self.checkout_strategy.fetch(checkout_id)
+        _, revision = self.checkout_strategy.target(checkout_id)
+        name = self.checkout_strategy.worktree_name(checkout_id)
+        with self.worktree_pool.worktree(name, revision) as source_dir:
+            logger.info(f"Building in worktree {source_dir}")
+            self.worktree_name = name
+            self.checkout_strategy.blender_repo_dir = source_dir
+            try:
+                yield source_dir
+            finally:
+                self.worktree_name = None
+
+    @property
+    def work_dir(self) -> Path:
+        """
+        Directory for the outputs of the current build.
+
+        With worktrees this is the locked worktree's pool entry, so concurrent
+        builds of different versions don't overwrite each other's files.
+        """
+        if self.worktree_pool is not None and self.worktree_name is not None:
+            return self.worktree_pool.entry_dir(self.worktree_name)
+        return self.root_dir
+
+    @property
+    def python_api_dir(self) -> Path:
+        return self.work_dir / "python_api"
+
+    def write_build_report(self, report: dict):
+        self.build_report = report
+        report_path = self.work_dir / "build_report.json"
+        with open(report_path, "w") as file:
+            json.dump(report, file, indent=2)
+        logger.info(f"Build report written to {report_path}")
+
     def publish_github(self, tag: str, wheel_dir: Path, repo_name: str):
 
         if not tag:
@@ -1051,7 +1463,7 @@ class BlenderBuilder:
                 prerelease=False,
             )
 
-        # Upload wheel files to the release
+        # Upload wheel files to the release over the shared, pooled client
         for wheel_file in wheel_dir.glob("*.whl"):
             for asset in release.get_assets():
                 if asset.name == wheel_file.name:
@@ -1060,15 +1472,6 @@ class BlenderBuilder:
 
             print(f"Uploading asset {wheel_file}")
 
-            # Set up the session with retries
-            session = requests.Session()
-            adapter = requests.adapters.HTTPAdapter(
-                max_retries=requests.urllib3.Retry(
-                    total=5, backoff_factor=1, status_forcelist=[500, 502, 503, 504]
-                )
-            )
-            session.mount("https://", adapter)
-
             # Verify token is being set correctly
             headers = {
                 "Authorization": f"Bearer {github_token}",  # Changed from 'token' to 'Bearer'
@@ -1091,8 +1494,12 @@ class BlenderBuilder:
                 with open(wheel_file, "rb") as f:
                     print(f"Starting upload of {file_size/1024/1024:.1f}MB file")
 
-                    response = session.post(
-                        upload_url, headers=headers, params=params, data=f, stream=True
+                    response = self.http_client.post(
+                        upload_url,
+                        headers={**headers, "Content-Length": str(file_size)},
+                        params=params,
+                        content=f,
+                        timeout=httpx.Timeout(60.0, write=None),
                     )
 
                     # Check if the upload was successful
@@ -1106,12 +1513,10 @@ class BlenderBuilder:
             except Exception as e:
                 print(f"Error uploading file: {e}")
                 raise
-            finally:
-                session.close()
 
 
 app = typer.Typer()
-http_client = httpx.Client()
+http_client = transport.create_client()
 strategy_factory = ConcreteStrategyFactory()
 github_token = os.getenv("GITHUB_TOKEN")
 github_client = Github(github_token)
@@ -1132,24 +1537,111 @@ def main(
     root_dir: str = typer.Option(
         None, help="Root directory for build artifacts (default: ~/.buildbpy)"
     ),
+    download_segments: int = typer.Option(
+        0,
+        help="Parallel connections for the Blender archive download (0 = auto-tune)",
+    ),
+    download_cache_gb: float = typer.Option(
+        10.0, help="Disk quota for cached Blender archives in GB"
+    ),
+    full_extract: bool = typer.Option(
+        False, help="Extract the whole Blender archive instead of what stub generation needs"
+    ),
+    extract_manifest: str = typer.Option(
+        None, help="JSON include/exclude manifest for extracting the Blender archive"
+    ),
+    xz_backend: str = typer.Option(
+        "auto", help="xz decoder for Linux archives: auto, xz (system xz -T0) or python"
+    ),
+    bin_cache_gb: float = typer.Option(
+        8.0, help="Disk quota for extracted Blender builds kept between runs in GB"
+    ),
+    clone_filter: str = typer.Option(
+        "blob:none",
+        help="Partial clone filter for a new Blender repository: blob:none, tree:0 or '' for a full clone",
+    ),
+    fetch_depth: int = typer.Option(
+        0, help="History depth fetched for the build target (0 = full history)"
+    ),
+    worktree: bool = typer.Option(
+        False,
+        help="Build in a per-series git worktree of the shared repository so concurrent builds don't collide",
+    ),
+    compiler_cache_launcher: str = typer.Option(
+        "auto",
+        "--compiler-cache",
+        help="Compiler cache for make bpy: auto, ccache, sccache or none",
+    ),
+    compiler_cache_gb: float = typer.Option(
+        20.0, help="Size limit of the compiler cache in GB"
+    ),
+    build_pool: bool = typer.Option(
+        False,
+        help="Keep build directories per version series and reuse the one closest to the target commit",
+    ),
+    build_pool_gb: float = typer.Option(
+        60.0, help="Disk quota for pooled build directories in GB"
+    ),
+    jobs: int = typer.Option(
+        0, help="Parallel compile jobs for make bpy (0 = from cores and available memory)"
+    ),
+    ninja: bool = typer.Option(
+        False,
+        help="Build with the Ninja generator and job pools for heavy compiles and links (Linux and macOS)",
+    ),
+    console_log: str = typer.Option(
+        "summary",
+        help="Console output: summary (no compiler output), verbose (everything) or quiet (warnings only)",
+    ),
 ):
     blender_repo_path = Path(blender_source_dir) if blender_source_dir else None
     root_dir_path = Path(root_dir) if root_dir else None
+    log_file = logs.configure_logging(
+        (root_dir_path or Path.home() / ".buildbpy") / "logs", console_log
+    )
+    logger.info(f"Logging to {log_file}")
+    if full_extract:
+        extract_filter = None
+    elif extract_manifest:
+        extract_filter = extract.MemberFilter.load(Path(extract_manifest))
+    else:
+        extract_filter = extract.MemberFilter.from_manifest(extract.STUB_MANIFEST)
 
     builder = BlenderBuilder(
-        blender_repo_path, http_client, strategy_factory, github_client, root_dir_path
-    )
-    return builder.main(
-        tag,
-        commit,
-        clear_lib,
-        clear_cache,
-        publish,
-        install,
-        publish_repo,
-        daily_version,
-        latest_daily,
+        blender_repo_path,
+        http_client,
+        strategy_factory,
+        github_client,
+        root_dir_path,
+        download_segments,
+        int(download_cache_gb * 1024**3),
+        extract_filter,
+        xz_backend,
+        int(bin_cache_gb * 1024**3),
+        clone_filter,
+        fetch_depth,
+        worktree,
+        compiler_cache_launcher,
+        int(compiler_cache_gb * 1024**3),
+        build_pool,
+        int(build_pool_gb * 1024**3),
+        jobs,
+        ninja,
     )
+    try:
+        return builder.main(
+            tag,
+            commit,
+            clear_lib,
+            clear_cache,
+            publish,
+            install,
+            publish_repo,
+            daily_version,
+            latest_daily,
+        )
+    finally:
+        transport.stats.log_report()
 
 
 if __name__ == "__main__":
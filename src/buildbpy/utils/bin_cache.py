@@ -0,0 +1,124 @@
+"""
+Cache of extracted Blender builds, one directory per archive.
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from . import treecopy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUOTA_BYTES = 8 * 1024**3
+COMPLETE_MARKER = ".complete"
+# Directories without a marker older than this are left over from a failed extraction
+STALE_AFTER = 60 * 60
+
+ARCHIVE_SUFFIXES = (".tar.xz", ".zip", ".dmg")
+
+
+def build_key(download_filename: str, extract_fingerprint: str) -> str:
+    """
+    Directory name for an archive extracted with a given member filter.
+
+    The same archive extracted with a different manifest gives a different
+    tree, so the filter fingerprint is part of the key.
+    """
+    name = Path(download_filename).name
+    for suffix in ARCHIVE_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+            break
+    return f"{name}-{extract_fingerprint}"
+
+
+class BinaryCache:
+    """
+    Extracted Blender trees kept in ``<cache_dir>/<key>`` between runs.
+
+    A tree is only reused once its ``.complete`` marker exists; the marker is
+    written after extraction finished and records the tree size. Its mtime is
+    the last use time, and complete trees are evicted least recently used
+    first once their total size exceeds ``quota_bytes``.
+    """
+
+    def __init__(self, cache_dir: Path, quota_bytes: int = DEFAULT_QUOTA_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.quota_bytes = quota_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def marker_path(self, key: str) -> Path:
+        return self.cache_dir / key / COMPLETE_MARKER
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Return the extracted tree for ``key`` if it is complete, marking it used."""
+        marker = self.marker_path(key)
+        if not marker.exists():
+            return None
+        os.utime(marker)
+        return marker.parent
+
+    def fetch(self, key: str, extract_fn: Callable[[Path], None]) -> Path:
+        """
+        Return the extracted tree for ``key``, extracting it with ``extract_fn`` if needed.
+
+        :param extract_fn: Called with an empty directory to extract into.
+        """
+        cached = self.lookup(key)
+        if cached is not None:
+            logger.info(f"Reusing extracted build {cached}")
+            return cached
+
+        target = self.cache_dir / key
+        if target.exists():
+            logger.info(f"Removing incomplete extraction {target}")
+            shutil.rmtree(target, onerror=treecopy.del_readonly)
+        target.mkdir(parents=True)
+
+        extract_fn(target)
+
+        marker = self.marker_path(key)
+        marker.write_text(
+            json.dumps({"size": treecopy.tree_size(target), "extracted_at": time.time()})
+        )
+        self.evict(keep=key)
+        return target
+
+    def _entry_size(self, marker: Path) -> int:
+        try:
+            return json.loads(marker.read_text())["size"]
+        except (OSError, ValueError, KeyError):
+            return treecopy.tree_size(marker.parent)
+
+    def evict(self, keep: Optional[str] = None):
+        """Remove least recently used trees until the cache fits its quota."""
+        now = time.time()
+        entries = []
+        for path in self.cache_dir.iterdir():
+            if not path.is_dir() or path.name == keep:
+                continue
+            marker = path / COMPLETE_MARKER
+            if marker.exists():
+                entries.append((marker.stat().st_mtime, path, self._entry_size(marker)))
+            elif now - path.stat().st_mtime > STALE_AFTER:
+                # Incomplete trees and the pre-cache flat layout of blender-bin
+                logger.info(f"Removing stale extraction {path}")
+                shutil.rmtree(path, onerror=treecopy.del_readonly)
+
+        kept = self.marker_path(keep) if keep else None
+        total = sum(size for _, _, size in entries)
+        if kept is not None and kept.exists():
+            total += self._entry_size(kept)
+
+        for _, path, size in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.quota_bytes:
+                break
+            logger.info(f"Evicting extracted build {path.name} ({size} bytes)")
+            shutil.rmtree(path, onerror=treecopy.del_readonly)
+            total -= size
+
@@ -0,0 +1,154 @@
+"""
+Pool of Blender build directories reused by the nearest previously built commit.
+"""
+
+import json
+import logging
+import os
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from typing import Optional
+
+from . import cmake_directives, treecopy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUOTA_BYTES = 60 * 1024**3
+# Beyond this many commits a second directory for the series is cheaper than reusing one
+REUSE_DISTANCE = 500
+SLOTS_PER_SERIES = 2
+
+
+def _same_path(a: str, b: str) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b))
+
+
+class BuildDirPool:
+    """
+    Build directories grouped by version series and source tree, each tagged
+    with the commit it last built.
+
+    :meth:`acquire` returns the directory whose last commit is the fewest
+    commits away from the target, so the compiler only rebuilds what
+    changed in between. A CMake build directory is bound to the source tree
+    it was configured from, so only directories of the same series and
+    source tree (the repository or one of its worktrees) are candidates. A
+    target further than ``REUSE_DISTANCE`` commits from every candidate gets
+    a new directory while there are free slots, which keeps e.g. an LTS
+    branch and its alpha from rebuilding each other's objects. Directories
+    are evicted least recently used first once the pool exceeds
+    ``quota_bytes``.
+    """
+
+    def __init__(
+        self,
+        pool_dir: Path,
+        repo_dir: Path,
+        quota_bytes: int = DEFAULT_QUOTA_BYTES,
+    ):
+        self.pool_dir = Path(pool_dir)
+        self.repo_dir = Path(repo_dir)
+        self.quota_bytes = quota_bytes
+        self.state_file = self.pool_dir / "pool.json"
+        self.pool_dir.mkdir(parents=True, exist_ok=True)
+
+    def _load(self) -> dict:
+        try:
+            state = json.loads(self.state_file.read_text())
+        except (OSError, ValueError):
+            return {}
+        return {name: entry for name, entry in state.items() if (self.pool_dir / name).exists()}
+
+    def _save(self, state: dict):
+        tmp_path = self.state_file.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(state, indent=2))
+        os.replace(tmp_path, self.state_file)
+
+    def distance(self, commit_a: Optional[str], commit_b: str) -> Optional[int]:
+        """Commits reachable from one but not the other, None if git cannot tell."""
+        if not commit_a:
+            return None
+        result = subprocess.run(
+            ["git", "rev-list", "--count", f"{commit_a}...{commit_b}"],
+            cwd=self.repo_dir,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return None
+        return int(result.stdout.strip())
+
+    def acquire(self, series: str, commit: str, source_dir: Path) -> Path:
+        """Return the build directory to use for ``commit`` of ``series`` built from ``source_dir``."""
+        source_dir = str(Path(source_dir).resolve())
+        state = self._load()
+        candidates = []
+        for name, entry in state.items():
+            if entry["series"] != series or entry.get("source_dir") != source_dir:
+                continue
+            cmake_home = cmake_directives.cache_value(
+                self.pool_dir / name, "CMAKE_HOME_DIRECTORY"
+            )
+            if cmake_home is not None and not _same_path(cmake_home, source_dir):
+                continue
+            distance = self.distance(entry.get("commit"), commit)
+            candidates.append(
+                (distance if distance is not None else float("inf"), -entry["last_used"], name)
+            )
+
+        best = min(candidates) if candidates else None
+        if best is None or (best[0] > REUSE_DISTANCE and len(candidates) < SLOTS_PER_SERIES):
+            index = 0
+            while f"{series}-{index}" in state or (self.pool_dir / f"{series}-{index}").exists():
+                index += 1
+            name = f"{series}-{index}"
+            logger.info(f"Creating build directory {name} for {commit[:12]}")
+            state[name] = {
+                "series": series,
+                "source_dir": source_dir,
+                "commit": None,
+                "size": 0,
+            }
+        else:
+            name = best[2]
+            distance = "unknown" if best[0] == float("inf") else best[0]
+            logger.info(
+                f"Reusing build directory {name} (last built {str(state[name]['commit'])[:12]}, "
+                f"{distance} commits from {commit[:12]})"
+            )
+
+        state[name]["last_used"] = time.time()
+        self._save(state)
+        path = self.pool_dir / name
+        path.mkdir(exist_ok=True)
+        return path
+
+    def record(self, build_dir: Path, commit: str):
+        """Tag ``build_dir`` with the commit it just built and enforce the quota."""
+        state = self._load()
+        entry = state.get(Path(build_dir).name)
+        if entry is None:
+            return
+        entry.update(commit=commit, last_used=time.time(), size=treecopy.tree_size(build_dir))
+        self._save(state)
+        self.evict(keep=Path(build_dir).name)
+
+    def evict(self, keep: Optional[str] = None):
+        """Remove least recently used build directories until the pool fits its quota."""
+        state = self._load()
+        total = sum(entry.get("size", 0) for entry in state.values())
+        for name in sorted(state, key=lambda n: state[n]["last_used"]):
+            if total <= self.quota_bytes:
+                break
+            if name == keep:
+                continue
+            logger.info(f"Evicting build directory {name} ({state[name]['size']} bytes)")
+            if (self.pool_dir / name).exists():
+                shutil.rmtree(self.pool_dir / name, onerror=treecopy.del_readonly)
+            total -= state.pop(name).get("size", 0)
+        self._save(state)
@@ -0,0 +1,115 @@
+"""
+Idempotent management of the CMake directives buildbpy adds to bpy_module.cmake.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+BEGIN_MARKER = "# BEGIN buildbpy directives"
+END_MARKER = "# END buildbpy directives"
+BLOCK_PATTERN = re.compile(
+    rf"\n*^{re.escape(BEGIN_MARKER)}.*?^{re.escape(END_MARKER)}$\n?", re.M | re.S
+)
+
+
+class DirectivesReport(NamedTuple):
+    digest: str
+    # The file content differs from what the previous build configured with
+    changed: bool
+    # The CMake cache takes new values: the content changed or there is no cache yet
+    cache_update: bool
+
+
+def render_block(directives: Iterable[str]) -> tuple[str, str]:
+    """Return the marked block for ``directives`` (de-duplicated, order kept) and its hash."""
+    unique = list(dict.fromkeys(d.strip() for d in directives if d.strip()))
+    body = "".join(f"{d}\n" for d in unique)
+    digest = hashlib.sha256(body.encode()).hexdigest()[:16]
+    return f"{BEGIN_MARKER} (sha256: {digest})\n{body}{END_MARKER}\n", digest
+
+
+def strip_directives(text: str, directives: Iterable[str]) -> str:
+    """Remove the marked block and bare copies of ``directives`` left by older appends."""
+    text = BLOCK_PATTERN.sub("\n", text)
+    appended = {d.strip() for d in directives}
+    lines = [line for line in text.splitlines() if line.strip() not in appended]
+    return "\n".join(lines).rstrip("\n") + "\n"
+
+
+def cache_value(build_dir: Path, name: str) -> Optional[str]:
+    """Return the value of ``name`` in the build directory's CMakeCache.txt, if any."""
+    try:
+        with open(Path(build_dir) / "CMakeCache.txt", encoding="utf-8", errors="replace") as file:
+            for line in file:
+                if line.startswith(f"{name}:"):
+                    return line.split("=", 1)[1].strip()
+    except OSError:
+        pass
+    return None
+
+
+def reset_cache(build_dir: Path):
+    """Drop the CMake cache so the next configure starts over, keeping built objects."""
+    build_dir = Path(build_dir)
+    (build_dir / "CMakeCache.txt").unlink(missing_ok=True)
+    shutil.rmtree(build_dir / "CMakeFiles", ignore_errors=True)
+
+
+def _load_state(state_file: Path) -> dict:
+    try:
+        return json.loads(state_file.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def apply_directives(
+    cmake_file: Path, directives: Iterable[str], state_file: Path, cache_exists: bool = True
+) -> DirectivesReport:
+    """
+    Make ``cmake_file`` end with exactly one block holding ``directives``.
+
+    The file is only written when its content would change. A checkout
+    resets the file to the upstream version, so when the rewritten file is
+    byte-identical to the one the previous build configured with, its
+    recorded mtime is restored from ``state_file`` and CMake sees no change.
+
+    :param cache_exists: Whether the build directory already has a CMakeCache.txt.
+    """
+    directives = list(directives)
+    cmake_file = Path(cmake_file)
+    current = cmake_file.read_text()
+    block, digest = render_block(directives)
+    content = strip_directives(current, directives) + "\n" + block
+    content_digest = hashlib.sha256(content.encode()).hexdigest()
+
+    if content != current:
+        cmake_file.write_text(content)
+
+    state = _load_state(state_file)
+    previous = state.get(str(cmake_file), {})
+    changed = previous.get("sha256") != content_digest
+    if not changed and previous.get("mtime_ns"):
+        os.utime(cmake_file, ns=(previous["mtime_ns"], previous["mtime_ns"]))
+    else:
+        state[str(cmake_file)] = {
+            "sha256": content_digest,
+            "mtime_ns": cmake_file.stat().st_mtime_ns,
+        }
+        state_file.parent.mkdir(parents=True, exist_ok=True)
+        state_file.write_text(json.dumps(state, indent=2))
+
+    report = DirectivesReport(digest, changed, changed or not cache_exists)
+    if report.cache_update:
+        reason = "directives changed" if changed else "no CMake cache yet"
+        logger.info(f"CMake directives {digest}: CMake cache will be updated ({reason})")
+    else:
+        logger.info(f"CMake directives {digest} unchanged, CMake cache is unchanged")
+    return report
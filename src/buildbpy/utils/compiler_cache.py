@@ -0,0 +1,163 @@
+"""
+ccache/sccache integration for the Blender compile step.
+"""
+
+import json
+import logging
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+LAUNCHERS = ("auto", "ccache", "sccache", "none")
+DEFAULT_SIZE_BYTES = 20 * 1024**3
+
+
+class CompilerCache:
+    """
+    A compiler launcher with its cache directory and size limit.
+
+    The launcher is injected through ``CMAKE_<LANG>_COMPILER_LAUNCHER``. Its
+    configuration is passed through the environment, which the make
+    subprocess inherits. Counters are zeroed before the compile step so
+    :meth:`log_report` covers this run only.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        executable: str,
+        cache_dir: Path,
+        max_size: int = DEFAULT_SIZE_BYTES,
+        base_dir: Optional[Path] = None,
+    ):
+        self.kind = kind
+        self.executable = executable
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+        # Paths below base_dir are hashed relative, so worktrees share cache entries
+        self.base_dir = base_dir
+
+    @classmethod
+    def detect(
+        cls,
+        launcher: str,
+        cache_root: Path,
+        max_size: int = DEFAULT_SIZE_BYTES,
+        base_dir: Optional[Path] = None,
+    ) -> Optional["CompilerCache"]:
+        """
+        Return the requested launcher if it is installed.
+
+        ``auto`` prefers ccache over sccache; ``none`` disables caching.
+        """
+        if launcher not in LAUNCHERS:
+            raise ValueError(f"Unknown compiler cache: {launcher}")
+        if launcher == "none":
+            return None
+        candidates = ("ccache", "sccache") if launcher == "auto" else (launcher,)
+        for kind in candidates:
+            executable = shutil.which(kind)
+            if executable:
+                logger.info(f"Using {kind} compiler cache in {cache_root / kind}")
+                return cls(kind, executable, cache_root / kind, max_size, base_dir)
+        if launcher != "auto":
+            logger.warning(f"{launcher} requested but not installed, compiling without a cache")
+        return None
+
+    def cmake_directives(self) -> list[str]:
+        executable = Path(self.executable).as_posix()
+        return [
+            f'set(CMAKE_C_COMPILER_LAUNCHER "{executable}" CACHE STRING "" FORCE)',
+            f'set(CMAKE_CXX_COMPILER_LAUNCHER "{executable}" CACHE STRING "" FORCE)',
+        ]
+
+    def environment(self) -> dict:
+        if self.kind == "ccache":
+            env = {
+                "CCACHE_DIR": str(self.cache_dir),
+                "CCACHE_MAXSIZE": f"{self.max_size // 1024**2}M",
+            }
+            if self.base_dir is not None:
+                env["CCACHE_BASEDIR"] = str(self.base_dir)
+                env["CCACHE_NOHASHDIR"] = "1"
+            return env
+        return {
+            "SCCACHE_DIR": str(self.cache_dir),
+            "SCCACHE_CACHE_SIZE": f"{self.max_size // 1024**2}M",
+        }
+
+    def _run(self, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [self.executable, *args],
+            capture_output=True,
+            text=True,
+            env={**os.environ, **self.environment()},
+        )
+
+    def prepare(self):
+        """Export the cache configuration and zero the statistics."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        os.environ.update(self.environment())
+        if self.kind == "sccache":
+            # The server reads its directory and size limit at startup
+            self._run("--stop-server")
+            self._run("--start-server")
+            self._run("--zero-stats")
+        else:
+            self._run("--zero-stats")
+
+    def stats(self) -> dict:
+        """Return ``{"hits": n, "misses": n}`` for this run, empty if unavailable."""
+        if self.kind == "ccache":
+            result = self._run("--print-stats")
+            if result.returncode != 0:
+                return {}
+            counters = {}
+            for line in result.stdout.splitlines():
+                key, _, value = line.partition("\t")
+                if value.strip().isdigit():
+                    counters[key] = int(value)
+            return {
+                "hits": counters.get("direct_cache_hit", 0)
+                + counters.get("preprocessed_cache_hit", 0),
+                "misses": counters.get("cache_miss", 0),
+            }
+
+        result = self._run("--show-stats", "--stats-format=json")
+        if result.returncode != 0:
+            return {}
+        try:
+            stats = json.loads(result.stdout)["stats"]
+        except (ValueError, KeyError):
+            return {}
+        return {
+            "hits": sum(stats.get("cache_hits", {}).get("counts", {}).values()),
+            "misses": sum(stats.get("cache_misses", {}).get("counts", {}).values()),
+        }
+
+    def log_report(self, compile_seconds: float, log=logger.info) -> dict:
+        """
+        Log hits, misses and an estimate of the compile time saved.
+
+        The estimate assumes a hit would have cost as much as an average miss did.
+
+        :return: The statistics, empty if unavailable.
+        """
+        stats = self.stats()
+        if not stats:
+            log(f"{self.kind}: statistics unavailable")
+            return stats
+        hits, misses = stats["hits"], stats["misses"]
+        total = hits + misses
+        rate = hits / total * 100 if total else 0.0
+        message = f"{self.kind}: {hits} hits, {misses} misses ({rate:.0f}% hit rate)"
+        if misses and hits:
+            saved = compile_seconds * hits / misses
+            message += f", ~{saved / 60:.0f} min compile time saved"
+            stats["seconds_saved"] = saved
+        log(message)
+        return stats
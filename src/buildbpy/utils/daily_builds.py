@@ -0,0 +1,126 @@
+"""
+Catalog of the daily builds published on builder.blender.org.
+"""
+
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DAILY_BUILDS_URL = "https://builder.blender.org/download/daily/?format=json&v=1"
+
+FILE_EXTENSIONS = {"windows": "zip", "darwin": "dmg", "linux": "xz"}
+
+
+def parse_version(version: str) -> tuple:
+    """
+    Parse a Blender version such as ``4.5.0`` or ``4.10.1`` into a sortable tuple.
+
+    Non-numeric components sort before numeric ones, so ``4.5`` < ``4.5.0``.
+    """
+    return tuple(
+        (1, int(part)) if part.isdigit() else (0, part)
+        for part in re.split(r"[.\-+]", version)
+        if part
+    )
+
+
+class DailyBuildCatalog:
+    """
+    The daily build listing, fetched at most once per run.
+
+    The listing is indexed by ``(platform, architecture, file_extension)`` with
+    each bucket sorted newest version first. When ``cache_file`` is given the
+    listing and its ETag are stored there, and later runs revalidate with
+    ``If-None-Match`` instead of downloading the full listing again.
+    """
+
+    def __init__(
+        self,
+        http_client: httpx.Client,
+        cache_file: Optional[Path] = None,
+        url: str = DAILY_BUILDS_URL,
+    ):
+        self.http_client = http_client
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.url = url
+        self._index = None
+
+    def _read_cache(self) -> dict:
+        if self.cache_file is None:
+            return {}
+        try:
+            return json.loads(self.cache_file.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _write_cache(self, etag: Optional[str], builds: list):
+        if self.cache_file is None:
+            return
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_file.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"etag": etag, "builds": builds}))
+        os.replace(tmp_path, self.cache_file)
+
+    def fetch(self) -> list:
+        """Return the raw build listing, revalidating a cached copy if there is one."""
+        cached = self._read_cache()
+        headers = {}
+        if cached.get("etag") and cached.get("builds") is not None:
+            headers["If-None-Match"] = cached["etag"]
+
+        response = self.http_client.get(self.url, headers=headers)
+        if response.status_code == 304:
+            logger.info("Daily build listing unchanged (304), using cached copy")
+            return cached["builds"]
+        response.raise_for_status()
+        builds = response.json()
+        self._write_cache(response.headers.get("ETag"), builds)
+        return builds
+
+    @property
+    def index(self) -> dict:
+        if self._index is None:
+            index = {}
+            for build in self.fetch():
+                key = (build["platform"], build["architecture"], build["file_extension"])
+                index.setdefault(key, []).append(build)
+            for builds in index.values():
+                builds.sort(
+                    key=lambda b: (parse_version(b["version"]), b.get("file_mtime", 0)),
+                    reverse=True,
+                )
+            self._index = index
+        return self._index
+
+    def builds(self, system: str, arch: str, file_extension: str) -> list:
+        """Builds for one platform, newest version first."""
+        return self.index.get((system, arch, file_extension), [])
+
+    def latest(
+        self,
+        system: str,
+        arch: str,
+        file_extension: str,
+        preferred_version: Optional[str] = None,
+    ) -> Optional[dict]:
+        """
+        Return the newest build for the platform, optionally restricted to a version prefix.
+
+        Falls back to the newest build when no build matches ``preferred_version``.
+        """
+        builds = self.builds(system, arch, file_extension)
+        if preferred_version:
+            match = next(
+                (b for b in builds if b["version"].startswith(preferred_version)), None
+            )
+            if match:
+                return match
+        return builds[0] if builds else None
+
@@ -1,12 +1,18 @@
 import subprocess
+import tempfile
 from pathlib import Path
 import os
-import shutil
+
+from . import treecopy
 
 class DMGExtractor:
-    def __init__(self, dmg_path, mount_point=Path.home() / 'dmgmountpoint'):
+    def __init__(self, dmg_path, mount_point=None):
         self.dmg_path = Path(dmg_path)
-        self.mount_point = mount_point
+        # A fresh mount point per extractor, so concurrent builds never share one
+        self.owns_mount_point = mount_point is None
+        self.mount_point = (
+            Path(tempfile.mkdtemp(prefix='dmgmountpoint-')) if mount_point is None else Path(mount_point)
+        )
 
     def __enter__(self):
         self.mount_dmg()
@@ -33,6 +39,8 @@ class DMGExtractor:
         # print(f"Mount Command Error: {result.stderr.decode()}")
 
         if result.returncode != 0:
+            if self.owns_mount_point:
+                self.mount_point.rmdir()
             raise Exception(f"Failed to mount dmg: {result.stderr.decode()}")
 
     def unmount_dmg(self):
@@ -40,9 +48,15 @@ class DMGExtractor:
         result = subprocess.run(unmount_cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         if result.returncode != 0:
             raise Exception(f"Failed to unmount dmg: {result.stderr.decode()}")
+        if self.owns_mount_point:
+            self.mount_point.rmdir()
+
+    def extractall(self, extraction_path: str, member_filter=None):
+        """ Copy all files from the mounted dmg to the extraction path
 
-    def extractall(self, extraction_path: str):
-        """ Copy all files from the mounted dmg to the extraction path """
+        member_filter, if given, is called with each path relative to the
+        mount point and returns False for files that should not be copied.
+        """
         extraction_path = Path(extraction_path)
 
         # exclude = ''  # Name of the shortcut to exclude
@@ -50,13 +64,25 @@ class DMGExtractor:
         if not extraction_path.exists():
             extraction_path.mkdir(parents=True)
 
+        def ignore(directory, names):
+            if member_filter is None:
+                return []
+            relative_dir = Path(directory).relative_to(self.mount_point).as_posix()
+            return [
+                name for name in names
+                if not member_filter(f"{relative_dir}/{name}" if relative_dir != "." else name)
+            ]
+
+        # The image is a separate read-only filesystem, so this mostly ends up
+        # as a thread-pooled copy; clones still apply where the OS supports them
+        copier = treecopy.TreeCopier()
         for item in os.listdir(self.mount_point):
             s = self.mount_point / item
             d = extraction_path / item
             if not s.is_symlink():
                 if s.is_dir():
-                    shutil.copytree(s, d, dirs_exist_ok=True)
-                else:
-                    shutil.copy2(s, d)
+                    copier.copy_tree(s, d, ignore=ignore)
+                elif member_filter is None or member_filter(item):
+                    copier.copy_file(s, d)
 
         print(f"Copied files to {extraction_path}")
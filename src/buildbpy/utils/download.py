@@ -0,0 +1,426 @@
+"""
+Streaming, resumable downloads for large Blender archives.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+MIN_SEGMENT_SIZE = 8 * CHUNK_SIZE
+
+# progress(downloaded_bytes, total_bytes_or_None)
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+class DownloadError(Exception):
+    """Raised when a download cannot be completed or fails verification."""
+
+
+def part_path(destination: Path) -> Path:
+    """Return the path of the in-progress file for ``destination``."""
+    return destination.with_name(destination.name + ".part")
+
+
+def segment_state_path(part: Path) -> Path:
+    """Return the segment progress file that marks ``part`` as a segmented download."""
+    return part.with_name(part.name + ".json")
+
+
+def hash_file(path: Path, chunk_size: int = CHUNK_SIZE, hasher=None):
+    """Feed the contents of ``path`` into ``hasher`` (sha256 by default) in chunks."""
+    hasher = hasher if hasher is not None else hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher
+
+
+def print_progress(label: str, step: int = 10) -> ProgressCallback:
+    """Return a progress callback that logs every ``step`` percent."""
+    last = {"percent": -step}
+
+    def callback(downloaded: int, total: Optional[int]):
+        if not total:
+            return
+        percent = downloaded * 100 // total
+        if percent >= last["percent"] + step or downloaded == total:
+            last["percent"] = percent
+            logger.info(
+                f"{label}: {percent}% ({downloaded / 1024 / 1024:.1f}/{total / 1024 / 1024:.1f} MB)"
+            )
+
+    return callback
+
+
+def _parse_content_range_total(value: Optional[str]) -> Optional[int]:
+    # "bytes 100-199/1000" or "bytes */1000"
+    if not value or "/" not in value:
+        return None
+    total = value.rsplit("/", 1)[1].strip()
+    return int(total) if total.isdigit() else None
+
+
+def _parse_content_range_start(value: Optional[str]) -> Optional[int]:
+    match = re.match(r"bytes (\d+)-", value or "")
+    return int(match.group(1)) if match else None
+
+
+def stream_download(
+    http_client: httpx.Client,
+    url: str,
+    destination: Path,
+    progress: Optional[ProgressCallback] = None,
+    retries: int = 5,
+    chunk_size: int = CHUNK_SIZE,
+) -> str:
+    """
+    Stream ``url`` into ``destination`` and return its SHA-256 hex digest.
+
+    Data is written to ``<destination>.part`` and only renamed into place once
+    complete. An existing ``.part`` file is resumed with an HTTP Range request;
+    if the server ignores the range the download restarts from zero. A
+    ``.part`` file left by :func:`segmented_download` is preallocated with
+    holes, so it is discarded instead of resumed. Transient transport errors
+    resume from the current offset up to ``retries`` times.
+    """
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    part = part_path(destination)
+    state_file = segment_state_path(part)
+    if state_file.exists():
+        part.unlink(missing_ok=True)
+        state_file.unlink()
+
+    attempt = 0
+    while True:
+        offset = part.stat().st_size if part.exists() else 0
+        hasher = hash_file(part, chunk_size) if offset else hashlib.sha256()
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        if offset:
+            logger.info(f"Resuming {destination.name} at {offset} bytes")
+
+        try:
+            with http_client.stream(
+                "GET", url, headers=headers, follow_redirects=True
+            ) as response:
+                if response.status_code == 416:
+                    # The part file already holds every byte the server has.
+                    total = _parse_content_range_total(
+                        response.headers.get("Content-Range")
+                    )
+                    if total == offset:
+                        break
+                    part.unlink()
+                    continue
+
+                response.raise_for_status()
+
+                mode = "ab"
+                if offset and response.status_code == 206:
+                    start = _parse_content_range_start(
+                        response.headers.get("Content-Range")
+                    )
+                    if start != offset:
+                        raise DownloadError(
+                            f"Server resumed {url} at {start}, expected {offset}"
+                        )
+                elif offset:
+                    logger.info(f"Server ignored Range for {url}, restarting")
+                    mode = "wb"
+                    offset = 0
+                    hasher = hashlib.sha256()
+
+                length = response.headers.get("Content-Length")
+                total = offset + int(length) if length is not None else None
+                downloaded = offset
+
+                with open(part, mode) as file:
+                    for chunk in response.iter_bytes(chunk_size):
+                        file.write(chunk)
+                        hasher.update(chunk)
+                        downloaded += len(chunk)
+                        if progress:
+                            progress(downloaded, total)
+
+                if total is not None and downloaded != total:
+                    raise httpx.ReadError(
+                        f"Connection closed at {downloaded} of {total} bytes"
+                    )
+            break
+        except httpx.TransportError as e:
+            attempt += 1
+            if attempt > retries:
+                raise DownloadError(f"Failed to download {url}: {e}") from e
+            logger.warning(f"Download of {url} interrupted ({e}), retry {attempt}/{retries}")
+
+    os.replace(part, destination)
+    return hasher.hexdigest()
+
+
+def parse_checksum_file(text: str, filename: str) -> Optional[str]:
+    """
+    Return the SHA-256 for ``filename`` from a ``sha256sum`` style listing.
+
+    A listing with a single bare digest (as published next to daily builds) is
+    accepted as the digest of ``filename``.
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    for line in lines:
+        parts = line.split()
+        if len(parts) >= 2 and parts[-1].lstrip("*") == filename:
+            return parts[0].lower()
+    if len(lines) == 1 and re.fullmatch(r"[0-9a-fA-F]{64}", lines[0].split()[0]):
+        return lines[0].split()[0].lower()
+    return None
+
+
+def fetch_expected_sha256(
+    http_client: httpx.Client, checksum_urls: Iterable[str], filename: str
+) -> Optional[str]:
+    """Return the published SHA-256 of ``filename`` from the first checksum URL that has it."""
+    for checksum_url in checksum_urls:
+        try:
+            response = http_client.get(checksum_url, follow_redirects=True)
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not fetch checksum {checksum_url}: {e}")
+            continue
+        if response.status_code != 200:
+            continue
+        expected = parse_checksum_file(response.text, filename)
+        if expected:
+            return expected
+    return None
+
+
+def verify_sha256(path: Path, digest: str, expected: Optional[str]):
+    """Remove ``path`` and raise if ``digest`` does not match ``expected``."""
+    if expected is None:
+        logger.warning(f"No published SHA-256 found for {path.name}, skipping verification")
+        return
+    if digest.lower() != expected.lower():
+        Path(path).unlink(missing_ok=True)
+        raise DownloadError(
+            f"SHA-256 mismatch for {path.name}: expected {expected}, got {digest}"
+        )
+    logger.info(f"Verified SHA-256 of {path.name}")
+
+
+class RangeNotSupported(DownloadError):
+    """Raised when a server answers a Range request with the full body."""
+
+
+def probe(http_client: httpx.Client, url: str):
+    """
+    Return ``(size, accepts_ranges)`` for ``url``.
+
+    ``size`` is None when the server does not report a length. Servers that
+    omit ``Accept-Ranges`` on HEAD are checked with a one-byte Range request.
+    """
+    response = http_client.head(url, follow_redirects=True)
+    response.raise_for_status()
+    length = response.headers.get("Content-Length")
+    size = int(length) if length is not None else None
+    if response.headers.get("Accept-Ranges", "").lower() == "bytes":
+        return size, True
+
+    with http_client.stream(
+        "GET", url, headers={"Range": "bytes=0-0"}, follow_redirects=True
+    ) as response:
+        accepts_ranges = response.status_code == 206
+        if accepts_ranges and size is None:
+            size = _parse_content_range_total(response.headers.get("Content-Range"))
+    return size, accepts_ranges
+
+
+class SegmentTuner:
+    """
+    Pick a segment count per host from the throughput of previous downloads.
+
+    Measurements are kept in a small JSON file as ``{host: {segments: bytes_per_second}}``.
+    The tuner doubles the segment count while that keeps improving throughput
+    and otherwise sticks with the best count measured so far.
+    """
+
+    def __init__(self, state_file: Path, initial: int = 4, maximum: int = 16):
+        self.state_file = Path(state_file)
+        self.initial = initial
+        self.maximum = maximum
+
+    def _load(self) -> dict:
+        try:
+            return json.loads(self.state_file.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def choose(self, host: str) -> int:
+        measurements = {int(n): bps for n, bps in self._load().get(host, {}).items()}
+        if not measurements:
+            return self.initial
+        best = max(measurements, key=measurements.get)
+        if best == max(measurements) and best * 2 <= self.maximum:
+            return best * 2
+        return best
+
+    def record(self, host: str, segments: int, bytes_per_second: float):
+        state = self._load()
+        state.setdefault(host, {})[str(segments)] = bytes_per_second
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        self.state_file.write_text(json.dumps(state, indent=2))
+
+
+def _split_ranges(size: int, segments: int):
+    step = -(-size // segments)
+    return [[start, min(start + step, size) - 1, 0] for start in range(0, size, step)]
+
+
+def segmented_download(
+    http_client: httpx.Client,
+    url: str,
+    destination: Path,
+    segments: int = 4,
+    progress: Optional[ProgressCallback] = None,
+    retries: int = 5,
+    min_segment_size: int = MIN_SEGMENT_SIZE,
+    chunk_size: int = CHUNK_SIZE,
+) -> str:
+    """
+    Download ``url`` over ``segments`` concurrent Range requests and return its SHA-256.
+
+    The ``.part`` file is preallocated to the full size and each segment writes
+    at its own offset. Per-segment progress is kept in ``<destination>.part.json``
+    so an interrupted download resumes every segment where it stopped. Falls
+    back to :func:`stream_download` when the server lacks Range support or the
+    file is too small to be worth splitting.
+    """
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    part = part_path(destination)
+    state_file = segment_state_path(part)
+
+    # A single stream needs no probe; stream_download discards a part file left by a segmented attempt
+    if segments <= 1:
+        return stream_download(http_client, url, destination, progress, retries, chunk_size)
+    size, accepts_ranges = probe(http_client, url)
+    if not accepts_ranges or not size or size < 2 * min_segment_size:
+        return stream_download(http_client, url, destination, progress, retries, chunk_size)
+
+    segments = min(segments, size // min_segment_size)
+    ranges = None
+    if part.exists() and state_file.exists():
+        try:
+            saved = json.loads(state_file.read_text())
+            # Mirrors serve identical bytes, so progress carries over when the URL changes
+            if saved.get("size") == size:
+                ranges = saved["ranges"]
+        except ValueError:
+            pass
+
+    lock = threading.Lock()
+
+    def save_state():
+        with lock:
+            state_file.write_text(json.dumps({"url": url, "size": size, "ranges": ranges}))
+
+    if ranges is None:
+        ranges = _split_ranges(size, segments)
+        # Mark the part file as segmented before it exists, even if this process is killed
+        save_state()
+        with open(part, "wb") as file:
+            file.truncate(size)
+
+    downloaded = [sum(r[2] for r in ranges)]
+
+    def fetch(segment):
+        start, end, _ = segment
+        attempt = 0
+        while segment[2] < end - start + 1:
+            headers = {"Range": f"bytes={start + segment[2]}-{end}"}
+            try:
+                with http_client.stream(
+                    "GET", url, headers=headers, follow_redirects=True
+                ) as response:
+                    if response.status_code == 200:
+                        raise RangeNotSupported(f"Server ignored Range for {url}")
+                    response.raise_for_status()
+                    with open(part, "r+b") as file:
+                        file.seek(start + segment[2])
+                        for chunk in response.iter_bytes(chunk_size):
+                            chunk = chunk[: end - start + 1 - segment[2]]
+                            file.write(chunk)
+                            with lock:
+                                segment[2] += len(chunk)
+                                downloaded[0] += len(chunk)
+                                current = downloaded[0]
+                            if progress:
+                                progress(current, size)
+                    if segment[2] < end - start + 1:
+                        raise httpx.ReadError(f"Segment {start}-{end} ended early")
+            except httpx.TransportError as e:
+                attempt += 1
+                if attempt > retries:
+                    raise DownloadError(f"Failed to download {url}: {e}") from e
+                logger.warning(
+                    f"Segment {start}-{end} of {url} interrupted ({e}), retry {attempt}/{retries}"
+                )
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            for future in [executor.submit(fetch, segment) for segment in ranges]:
+                future.result()
+    except RangeNotSupported:
+        part.unlink(missing_ok=True)
+        state_file.unlink(missing_ok=True)
+        return stream_download(http_client, url, destination, progress, retries, chunk_size)
+    except BaseException:
+        save_state()
+        raise
+
+    digest = hash_file(part, chunk_size).hexdigest()
+    os.replace(part, destination)
+    state_file.unlink(missing_ok=True)
+    return digest
+
+
+def tuned_download(
+    http_client: httpx.Client,
+    url: str,
+    destination: Path,
+    segments: int = 0,
+    tuner: Optional[SegmentTuner] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> str:
+    """
+    Download ``url`` with a fixed segment count, or an auto-tuned one when ``segments`` is 0.
+
+    The measured throughput of auto-tuned downloads is fed back into ``tuner``.
+    """
+    host = httpx.URL(url).host
+    auto = segments <= 0 and tuner is not None
+    if auto:
+        segments = tuner.choose(host)
+    logger.info(f"Downloading {url} with {max(segments, 1)} segment(s)")
+
+    started = time.monotonic()
+    digest = segmented_download(http_client, url, destination, segments, progress)
+    elapsed = time.monotonic() - started
+
+    size = Path(destination).stat().st_size
+    bytes_per_second = size / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        f"Downloaded {size / 1024 / 1024:.1f} MB in {elapsed:.1f}s ({bytes_per_second / 1024 / 1024:.1f} MB/s)"
+    )
+    if auto and size >= 2 * MIN_SEGMENT_SIZE:
+        tuner.record(host, segments, bytes_per_second)
+    return digest
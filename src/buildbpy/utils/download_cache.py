@@ -0,0 +1,189 @@
+"""
+Content-addressed cache for downloaded archives with HTTP revalidation.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUOTA_BYTES = 10 * 1024**3
+
+
+class DownloadCache:
+    """
+    Cache of downloaded files keyed by URL and stored by SHA-256.
+
+    ``index.json`` maps each URL to its ETag, Last-Modified, size, SHA-256 and
+    last use time. File contents live in ``objects/<sha256>/<filename>`` so
+    URLs that serve identical bytes share one copy, and the original file name
+    (and extension) is kept for tools that care about it. Repeat requests for
+    a cached URL are revalidated with a conditional GET, and a 304 reuses the
+    stored object without transferring the body. Objects are evicted least recently used
+    first once the cache exceeds ``quota_bytes``.
+    """
+
+    def __init__(self, cache_dir: Path, quota_bytes: int = DEFAULT_QUOTA_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / "objects"
+        self.tmp_dir = self.cache_dir / "tmp"
+        self.index_path = self.cache_dir / "index.json"
+        self.quota_bytes = quota_bytes
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self) -> dict:
+        try:
+            return json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp_path = self.index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.index, indent=2))
+        os.replace(tmp_path, self.index_path)
+
+    def object_path(self, entry: dict) -> Path:
+        return self.objects_dir / entry["sha256"] / entry["filename"]
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """Return the index entry for ``url`` if its object is still present."""
+        entry = self.index.get(url)
+        if entry and self.object_path(entry).exists():
+            return entry
+        return None
+
+    def revalidate(self, http_client: httpx.Client, url: str) -> Optional[Path]:
+        """
+        Return the cached object for ``url`` if the server confirms it is current.
+
+        Sends a conditional GET with the stored validators. Only the response
+        headers are read; a changed resource is left for the caller to download.
+        """
+        entry = self.lookup(url)
+        if entry is None:
+            return None
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        if not headers:
+            return None
+
+        try:
+            with http_client.stream(
+                "GET", url, headers=headers, follow_redirects=True
+            ) as response:
+                status_code = response.status_code
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not revalidate cached {url}: {e}")
+            return None
+
+        if status_code != 304:
+            return None
+        logger.info(f"Cached copy of {url} is current (304), reusing it")
+        entry["last_used"] = time.time()
+        self._save_index()
+        return self.object_path(entry)
+
+    def staging_path(self, url: str, filename: str) -> Path:
+        """
+        Stable download location for ``url`` so interrupted downloads resume.
+        """
+        key = hashlib.sha256(url.encode()).hexdigest()[:16]
+        path = self.tmp_dir / key / filename
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def store(self, url: str, path: Path, sha256: str, headers=None) -> Path:
+        """Move a finished download into the cache and record it under ``url``."""
+        headers = headers or {}
+        path = Path(path)
+        existing = next(self.objects_dir.glob(f"{sha256}/*"), None)
+        if existing is not None:
+            path.unlink()
+            target = existing
+        else:
+            target = self.objects_dir / sha256 / path.name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(path, target)
+        try:
+            path.parent.rmdir()
+        except OSError:
+            pass
+
+        entry = {
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "size": target.stat().st_size,
+            "sha256": sha256,
+            "filename": target.name,
+            "last_used": time.time(),
+        }
+        self.index[url] = entry
+        self.evict(keep=sha256)
+        self._save_index()
+        return target
+
+    def fetch(
+        self,
+        http_client: httpx.Client,
+        url: str,
+        filename: str,
+        download_fn: Callable[[Path], str],
+    ) -> Path:
+        """
+        Return a cached copy of ``url``, downloading it with ``download_fn`` if needed.
+
+        :param download_fn: Called with the staging path; must download there
+            and return the SHA-256 hex digest of the file.
+        """
+        cached = self.revalidate(http_client, url)
+        if cached is not None:
+            return cached
+
+        staging = self.staging_path(url, filename)
+        sha256 = download_fn(staging)
+        try:
+            headers = http_client.head(url, follow_redirects=True).headers
+        except httpx.HTTPError:
+            headers = {}
+        return self.store(url, staging, sha256, headers)
+
+    def evict(self, keep: Optional[str] = None):
+        """Remove least recently used objects until the cache fits its quota."""
+        last_used = {}
+        for entry in self.index.values():
+            sha256 = entry["sha256"]
+            last_used[sha256] = max(last_used.get(sha256, 0), entry["last_used"])
+
+        sizes = {
+            path.name: sum(f.stat().st_size for f in path.iterdir())
+            for path in self.objects_dir.iterdir()
+        }
+        total = sum(sizes.values())
+        for sha256 in sorted(sizes, key=lambda name: last_used.get(name, 0)):
+            if total <= self.quota_bytes:
+                break
+            if sha256 == keep:
+                continue
+            logger.info(f"Evicting cached download {sha256} ({sizes[sha256]} bytes)")
+            shutil.rmtree(self.objects_dir / sha256)
+            total -= sizes[sha256]
+
+        self.index = {
+            url: entry
+            for url, entry in self.index.items()
+            if self.object_path(entry).exists()
+        }
@@ -0,0 +1,243 @@
+"""
+Selective extraction of Blender archives.
+"""
+
+import hashlib
+import json
+import logging
+import lzma
+import shutil
+import subprocess
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from fnmatch import fnmatchcase
+from pathlib import Path, PurePosixPath
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+XZ_BACKENDS = ("auto", "xz", "python")
+
+# Members that running ``blender --background --factory-startup`` for
+# sphinx_doc_gen.py never touches: translations, bundled assets, GPU kernels
+# (Cycles falls back to the CPU device without them) and Python test suites.
+STUB_MANIFEST = {
+    "include": [],
+    "exclude": [
+        "*/datafiles/locale/*",
+        "*/datafiles/assets/*",
+        "*/datafiles/studiolights/*",
+        "*/scripts/addons*/cycles/lib/*",
+        "*/lib/libcycles_kernel_oneapi*",
+        "*/lib/libsycl*",
+        "*/lib/libpi_*",
+        "*/lib/libOpenImageDenoise_device_*",
+        "*/blender.shared/cycles_kernel_oneapi*",
+        "*/blender.shared/sycl*",
+        "*/blender.shared/pi_*",
+        "*/blender.shared/OpenImageDenoise_device_*",
+        "*/python/lib/python3*/test/*",
+        "*/python/lib/python3*/site-packages/*/tests/*",
+        "*/python/lib/test/*",
+        "*.pdb",
+    ],
+}
+
+
+class MemberFilter:
+    """
+    Decide which archive members to extract from include/exclude glob lists.
+
+    Patterns use ``fnmatch`` syntax against the member path with forward
+    slashes, where ``*`` also matches ``/``. An empty include list includes
+    everything; excludes win over includes.
+    """
+
+    def __init__(self, include: Iterable[str] = (), exclude: Iterable[str] = ()):
+        self.include = list(include)
+        self.exclude = list(exclude)
+
+    @classmethod
+    def from_manifest(cls, manifest: dict) -> "MemberFilter":
+        return cls(manifest.get("include", []), manifest.get("exclude", []))
+
+    @classmethod
+    def load(cls, manifest_path: Path) -> "MemberFilter":
+        """Load a JSON manifest of the form ``{"include": [...], "exclude": [...]}``."""
+        with open(manifest_path, "r") as file:
+            return cls.from_manifest(json.load(file))
+
+    def fingerprint(self) -> str:
+        """Short stable hash of the pattern lists, to key trees extracted with this filter."""
+        encoded = json.dumps({"include": self.include, "exclude": self.exclude}).encode()
+        return hashlib.sha256(encoded).hexdigest()[:8]
+
+    def __call__(self, name: str) -> bool:
+        name = name.replace("\\", "/")
+        if self.include and not any(fnmatchcase(name, p) for p in self.include):
+            return False
+        return not any(fnmatchcase(name, p) for p in self.exclude)
+
+
+def _log_skipped(archive: Path, extracted: int, skipped: int, skipped_bytes: int):
+    logger.info(
+        f"Extracted {extracted} members from {Path(archive).name}, "
+        f"skipped {skipped} ({skipped_bytes / 1024 / 1024:.1f} MB uncompressed)"
+    )
+
+
+class _CountingReader:
+    """File-like wrapper that counts the bytes read through it."""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.count = 0
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        self.count += len(data)
+        return data
+
+
+@contextmanager
+def open_xz(archive: Path, backend: str = "auto"):
+    """
+    Yield ``(fileobj, backend_name)`` with the decompressed contents of ``archive``.
+
+    ``xz`` pipes through the system ``xz -T0``, which decodes on every core
+    (multi-threaded decoding needs xz 5.4+; older versions decode on one
+    core but still outside the GIL). ``python`` uses the stdlib ``lzma``
+    module. ``auto`` picks ``xz`` when it is installed.
+    """
+    if backend not in XZ_BACKENDS:
+        raise ValueError(f"Unknown xz backend: {backend}")
+    xz = shutil.which("xz")
+    if backend == "xz" and xz is None:
+        raise FileNotFoundError("xz backend requested but the xz command was not found")
+
+    if backend != "python" and xz is not None:
+        process = subprocess.Popen(
+            [xz, "-T0", "--decompress", "--stdout", str(archive)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=1024 * 1024,
+        )
+        try:
+            yield process.stdout, "xz -T0"
+            # tar stops at its end-of-archive marker; drain the padding so xz exits cleanly
+            while process.stdout.read(1024 * 1024):
+                pass
+        except BaseException:
+            process.kill()
+            raise
+        finally:
+            process.stdout.close()
+            stderr = process.stderr.read().decode(errors="replace")
+            process.stderr.close()
+            return_code = process.wait()
+        if return_code != 0:
+            raise RuntimeError(f"xz failed with return code {return_code}: {stderr.strip()}")
+    else:
+        with lzma.open(archive, "rb") as fileobj:
+            yield fileobj, "python lzma"
+
+
+def extract_tar(
+    archive: Path,
+    destination: Path,
+    member_filter: Optional[Callable[[str], bool]] = None,
+    backend: str = "auto",
+):
+    """
+    Stream a tar.xz archive and write only members accepted by ``member_filter``.
+
+    The archive is read sequentially in one pass, so nothing but the selected
+    members is ever written to disk. Decompression uses the ``open_xz``
+    ``backend`` and its throughput is logged so backends can be compared.
+    """
+    extracted = skipped = skipped_bytes = 0
+    started = time.monotonic()
+    with open_xz(archive, backend) as (fileobj, backend_name):
+        reader = _CountingReader(fileobj)
+        with tarfile.open(fileobj=reader, mode="r|") as tar:
+            for member in tar:
+                if member_filter is None or member_filter(member.name):
+                    tar.extract(member, destination)
+                    extracted += 1
+                else:
+                    skipped += 1
+                    skipped_bytes += member.size
+    elapsed = time.monotonic() - started
+
+    _log_skipped(archive, extracted, skipped, skipped_bytes)
+    compressed = Path(archive).stat().st_size / 1024 / 1024
+    decompressed = reader.count / 1024 / 1024
+    if elapsed > 0:
+        logger.info(
+            f"{backend_name}: {compressed:.1f} MB -> {decompressed:.1f} MB in {elapsed:.1f}s "
+            f"({compressed / elapsed:.1f} MB/s compressed, {decompressed / elapsed:.1f} MB/s decompressed)"
+        )
+
+
+def _zip_member_path(destination: Path, name: str) -> Path:
+    # Same sanitising as zipfile.extract: no absolute paths, drive letters or ".."
+    parts = [
+        part
+        for part in PurePosixPath(name.replace("\\", "/")).parts
+        if part not in ("", ".", "..", "/") and ":" not in part
+    ]
+    return destination.joinpath(*parts)
+
+
+def extract_zip(
+    archive: Path,
+    destination: Path,
+    member_filter: Optional[Callable[[str], bool]] = None,
+    workers: Optional[int] = None,
+):
+    """
+    Extract the zip members accepted by ``member_filter`` on a thread pool.
+
+    The central directory is read once, every target directory is created up
+    front, then members are inflated concurrently (zlib releases the GIL).
+    The workers share one ``ZipFile``: each open member reads through the
+    archive's lock-protected shared file handle. ``workers=1`` extracts serially.
+    """
+    destination = Path(destination)
+    started = time.monotonic()
+    with zipfile.ZipFile(archive, "r") as zip_ref:
+        selected = []
+        skipped = skipped_bytes = 0
+        for info in zip_ref.infolist():
+            if member_filter is None or member_filter(info.filename):
+                selected.append(info)
+            else:
+                skipped += 1
+                skipped_bytes += info.file_size
+
+        targets = [(info, _zip_member_path(destination, info.filename)) for info in selected]
+        directories = {target for info, target in targets if info.is_dir()}
+        directories.update(target.parent for info, target in targets if not info.is_dir())
+        for directory in sorted(directories):
+            directory.mkdir(parents=True, exist_ok=True)
+
+        def inflate(item):
+            info, target = item
+            with zip_ref.open(info) as source, open(target, "wb") as target_file:
+                shutil.copyfileobj(source, target_file, 1024 * 1024)
+            return info.file_size
+
+        files = [item for item in targets if not item[0].is_dir()]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            written = sum(executor.map(inflate, files))
+    elapsed = time.monotonic() - started
+
+    _log_skipped(archive, len(selected), skipped, skipped_bytes)
+    if elapsed > 0:
+        logger.info(
+            f"Inflated {len(files)} files ({written / 1024 / 1024:.1f} MB) in {elapsed:.1f}s "
+            f"({written / 1024 / 1024 / elapsed:.1f} MB/s)"
+        )
@@ -0,0 +1,279 @@
+"""
+Compile parallelism from cores and memory, with a memory governor for the build.
+"""
+
+import ctypes
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+GB = 1024**3
+# Rough peak resident memory per job when compiling and linking Blender
+COMPILE_JOB_MEMORY = 2 * GB
+HEAVY_JOB_MEMORY = 6 * GB
+LINK_JOB_MEMORY = 8 * GB
+# Memory left to the OS and everything else on the builder
+MEMORY_RESERVE = 4 * GB
+
+
+def available_memory() -> Optional[int]:
+    """Memory available to new processes in bytes, None if it cannot be read."""
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/meminfo") as file:
+                for line in file:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            return None
+    elif sys.platform == "darwin":
+        # Free plus inactive pages, the closest equivalent of MemAvailable
+        try:
+            output = subprocess.run(["vm_stat"], capture_output=True, text=True).stdout
+        except OSError:
+            return None
+        pages = {}
+        page_size = 4096
+        for line in output.splitlines():
+            if "page size of" in line:
+                page_size = int(line.split("page size of")[1].split()[0])
+            key, _, value = line.partition(":")
+            if value.strip().rstrip(".").isdigit():
+                pages[key.strip()] = int(value.strip().rstrip("."))
+        return (pages.get("Pages free", 0) + pages.get("Pages inactive", 0)) * page_size
+    elif sys.platform == "win32":
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+    return None
+
+
+class JobPlan(NamedTuple):
+    cores: int
+    available_memory: Optional[int]
+    compile_jobs: int
+    heavy_jobs: int
+    link_jobs: int
+
+    def cmake_directives(self) -> list[str]:
+        """
+        Blender's Ninja job pools for heavy compiles and links.
+
+        Overall compile parallelism goes through make's ``NPROCS`` instead,
+        so it can follow free memory without touching the CMake cache.
+        """
+        return [
+            'set(WITH_NINJA_POOL_JOBS ON CACHE BOOL "" FORCE)',
+            f'set(NINJA_MAX_NUM_PARALLEL_COMPILE_HEAVY_JOBS "{self.heavy_jobs}" CACHE STRING "" FORCE)',
+            f'set(NINJA_MAX_NUM_PARALLEL_LINK_JOBS "{self.link_jobs}" CACHE STRING "" FORCE)',
+        ]
+
+    def as_dict(self) -> dict:
+        return self._asdict()
+
+
+def plan_jobs(jobs: int = 0, cores: Optional[int] = None, memory: Optional[int] = None) -> JobPlan:
+    """
+    Choose compile, heavy-compile and link parallelism for this machine.
+
+    Compile jobs are limited by cores and by available memory at
+    ``COMPILE_JOB_MEMORY`` each; heavy compiles and links get their own,
+    larger per-job budgets. ``jobs`` > 0 fixes the compile job count.
+    """
+    cores = cores or os.cpu_count() or 1
+    memory = memory if memory is not None else available_memory()
+    if memory is None:
+        budget = None
+        compile_jobs = cores
+    else:
+        budget = max(memory - MEMORY_RESERVE, 0)
+        compile_jobs = max(1, min(cores, budget // COMPILE_JOB_MEMORY))
+    if jobs > 0:
+        compile_jobs = jobs
+    if budget is None:
+        heavy_jobs = link_jobs = max(1, compile_jobs // 4)
+    else:
+        heavy_jobs = max(1, min(compile_jobs, budget // HEAVY_JOB_MEMORY))
+        link_jobs = max(1, min(compile_jobs, budget // LINK_JOB_MEMORY))
+    # Powers of two, so run-to-run memory noise doesn't change the CMake directives
+    heavy_jobs = 1 << (heavy_jobs.bit_length() - 1)
+    link_jobs = 1 << (link_jobs.bit_length() - 1)
+    plan = JobPlan(cores, memory, compile_jobs, heavy_jobs, link_jobs)
+    memory_text = f"{memory / GB:.1f} GB available" if memory is not None else "memory unknown"
+    logger.info(
+        f"Job plan: {compile_jobs} compile, {heavy_jobs} heavy, {link_jobs} link jobs "
+        f"({cores} cores, {memory_text})"
+    )
+    return plan
+
+
+# Processes that start build jobs: stopping them holds back new jobs only
+SCHEDULERS = frozenset({"make", "gmake", "ninja"})
+
+
+class MemoryGovernor:
+    """
+    Hold back new build jobs while memory runs low.
+
+    Below ``reserve`` available memory the job schedulers under this
+    process (make and ninja) are stopped with SIGSTOP. Running compilers and
+    linkers carry on and return their memory as they exit, but no new job
+    starts until memory recovers to twice the reserve. If memory falls below
+    half the reserve anyway, the newest running job is stopped too. That
+    does not free its pages, it only keeps the job from growing further and
+    lets the kernel swap it out rather than kill the build. One job is
+    always left running, and everything is resumed once no job is running,
+    so the build cannot stall. This needs ``/proc`` and is a no-op elsewhere.
+    """
+
+    def __init__(self, reserve: int = MEMORY_RESERVE // 2, interval: float = 1.0):
+        self.reserve = reserve
+        self.interval = interval
+        self.enabled = sys.platform.startswith("linux") and os.path.isdir("/proc")
+        self.stopped = []
+        self.paused = []
+        self.throttle_count = 0
+        self.pause_count = 0
+        self.min_available: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _build_processes(self) -> tuple[list, list]:
+        """Schedulers and leaf jobs below this process, each oldest first."""
+        parents = {}
+        names = {}
+        states = {}
+        started = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as file:
+                    content = file.read()
+            except OSError:
+                continue
+            pid = int(entry)
+            name, fields = content.split("(", 1)[1].rsplit(")", 1)
+            fields = fields.split()
+            names[pid] = name
+            states[pid] = fields[0]
+            parents[pid] = int(fields[1])
+            started[pid] = int(fields[19])
+
+        children = {}
+        for pid, ppid in parents.items():
+            children.setdefault(ppid, []).append(pid)
+        descendants = []
+        stack = list(children.get(os.getpid(), []))
+        while stack:
+            pid = stack.pop()
+            descendants.append(pid)
+            stack.extend(children.get(pid, []))
+        schedulers = [pid for pid in descendants if names[pid] in SCHEDULERS]
+        # Exited jobs a stopped scheduler has not reaped yet are zombies, not running jobs
+        jobs = [
+            pid
+            for pid in descendants
+            if pid not in children and pid not in schedulers and states[pid] != "Z"
+        ]
+        return (
+            sorted(schedulers, key=lambda pid: started[pid]),
+            sorted(jobs, key=lambda pid: started[pid]),
+        )
+
+    def _signal(self, pid: int, sig) -> bool:
+        try:
+            os.kill(pid, sig)
+            return True
+        except OSError:
+            return False
+
+    def _resume_schedulers(self):
+        for pid in self.stopped:
+            self._signal(pid, signal.SIGCONT)
+        self.stopped = []
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            available = available_memory()
+            if available is None:
+                continue
+            if self.min_available is None or available < self.min_available:
+                self.min_available = available
+            schedulers, jobs = self._build_processes()
+            running = [pid for pid in jobs if pid not in self.paused]
+
+            if available < self.reserve:
+                if not self.stopped:
+                    self.stopped = [pid for pid in schedulers if self._signal(pid, signal.SIGSTOP)]
+                    if self.stopped:
+                        self.throttle_count += 1
+                        logger.warning(
+                            f"{available / GB:.1f} GB available, holding back new build jobs"
+                        )
+                elif available < self.reserve // 2 and len(running) > 1:
+                    if self._signal(running[-1], signal.SIGSTOP):
+                        self.paused.append(running[-1])
+                        self.pause_count += 1
+                        running.pop()
+                        logger.warning(
+                            f"{available / GB:.1f} GB available, pausing build process {self.paused[-1]}"
+                        )
+            elif available > self.reserve * 2:
+                if self.paused:
+                    pid = self.paused.pop(0)
+                    self._signal(pid, signal.SIGCONT)
+                    logger.info(f"{available / GB:.1f} GB available, resuming build process {pid}")
+                elif self.stopped:
+                    self._resume_schedulers()
+                    logger.info(f"{available / GB:.1f} GB available, starting new build jobs again")
+
+            # Nothing left running: let the build progress whatever the memory
+            if not running:
+                if self.paused:
+                    self._signal(self.paused.pop(0), signal.SIGCONT)
+                elif self.stopped:
+                    self._resume_schedulers()
+
+    def __enter__(self):
+        if self.enabled:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+        for pid in self.paused:
+            self._signal(pid, signal.SIGCONT)
+        self.paused = []
+        self._resume_schedulers()
+
+    def as_dict(self) -> dict:
+        return {
+            "throttled": self.throttle_count,
+            "paused_processes": self.pause_count,
+            "min_available_memory": self.min_available,
+        }
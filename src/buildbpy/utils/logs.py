@@ -0,0 +1,119 @@
+"""
+Queue-based logging with rotating, compressed per-run log files.
+"""
+
+import atexit
+import gzip
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import time
+from pathlib import Path
+from typing import Optional
+
+# Logger that carries raw subprocess output (compiler lines and the like)
+OUTPUT_LOGGER = "buildbpy.output"
+
+CONSOLE_MODES = ("summary", "verbose", "quiet")
+DEFAULT_MAX_BYTES = 100 * 1024**2
+DEFAULT_BACKUP_COUNT = 10
+DEFAULT_KEEP_RUNS = 20
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """``RotatingFileHandler`` whose rotated files are gzip-compressed."""
+
+    def __init__(self, filename, max_bytes: int, backup_count: int):
+        super().__init__(
+            filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        self.namer = lambda name: f"{name}.gz"
+        self.rotator = self._compress
+
+    @staticmethod
+    def _compress(source: str, destination: str):
+        with open(source, "rb") as src, gzip.open(destination, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.remove(source)
+
+
+class _HideOutput(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not record.name.startswith(OUTPUT_LOGGER)
+
+
+def _prune_runs(log_dir: Path, keep_runs: int):
+    """Delete all but the newest ``keep_runs`` run logs and their archives."""
+    runs = sorted(log_dir.glob("buildbpy-*.log"), key=lambda path: path.stat().st_mtime)
+    for run in runs[: max(len(runs) - keep_runs, 0)]:
+        for path in log_dir.glob(f"{run.name}*"):
+            path.unlink(missing_ok=True)
+
+
+def configure_logging(
+    log_dir: Path,
+    console: str = "summary",
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    backup_count: int = DEFAULT_BACKUP_COUNT,
+    keep_runs: int = DEFAULT_KEEP_RUNS,
+) -> Path:
+    """
+    Route all logging through a queue to a background writer thread.
+
+    Each run writes ``<log_dir>/buildbpy-<timestamp>.log``, rotated at
+    ``max_bytes`` into gzip archives, and only the newest ``keep_runs`` runs
+    are kept. The file gets everything. The console gets, by ``console``
+    mode: ``summary`` everything except raw subprocess output, ``verbose``
+    everything, ``quiet`` warnings and errors only.
+
+    :return: Path of this run's log file.
+    """
+    global _listener
+    if console not in CONSOLE_MODES:
+        raise ValueError(f"Unknown console mode: {console}")
+    stop_logging()
+
+    log_dir = Path(log_dir)
+    log_dir.mkdir(parents=True, exist_ok=True)
+    _prune_runs(log_dir, keep_runs - 1)
+    log_file = log_dir / f"buildbpy-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.log"
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = CompressingRotatingFileHandler(log_file, max_bytes, backup_count)
+    file_handler.setFormatter(formatter)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    console_handler.setLevel(logging.WARNING if console == "quiet" else logging.INFO)
+    if console == "summary":
+        console_handler.addFilter(_HideOutput())
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    root.setLevel(logging.INFO)
+
+    _listener = logging.handlers.QueueListener(
+        records, file_handler, console_handler, respect_handler_level=True
+    )
+    _listener.start()
+    return log_file
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,149 @@
+"""
+Mirror ranking and failover for Blender release downloads.
+"""
+
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+import httpx
+
+from . import download
+
+logger = logging.getLogger(__name__)
+
+PROBE_BYTES = 256 * 1024
+MEASUREMENT_TTL = 24 * 60 * 60
+
+
+def mirror_host(url: str) -> str:
+    return httpx.URL(url).host
+
+
+class MirrorSelector:
+    """
+    Rank mirrors by measured throughput.
+
+    Each mirror is probed with a small Range request that records latency
+    (time to response headers) and throughput. Results are kept in a JSON
+    file; while they are younger than ``ttl`` seconds the next run uses the
+    stored ranking without probing again. Throughput of real downloads is
+    recorded as well, so the ranking follows what the runners actually see.
+    """
+
+    def __init__(self, state_file: Path, ttl: float = MEASUREMENT_TTL):
+        self.state_file = Path(state_file)
+        self.ttl = ttl
+
+    def _load(self) -> dict:
+        try:
+            return json.loads(self.state_file.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, state: dict):
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        self.state_file.write_text(json.dumps(state, indent=2))
+
+    def record(self, url: str, latency: Optional[float], bytes_per_second: float):
+        state = self._load()
+        previous = state.get(mirror_host(url), {})
+        state[mirror_host(url)] = {
+            "latency": latency if latency is not None else previous.get("latency"),
+            "bytes_per_second": bytes_per_second,
+            "measured_at": time.time(),
+        }
+        self._save(state)
+
+    def probe(self, http_client: httpx.Client, url: str) -> dict:
+        """Fetch the first ``PROBE_BYTES`` of ``url`` and measure latency and throughput."""
+        headers = {"Range": f"bytes=0-{PROBE_BYTES - 1}"}
+        started = time.monotonic()
+        try:
+            with http_client.stream(
+                "GET", url, headers=headers, follow_redirects=True
+            ) as response:
+                latency = time.monotonic() - started
+                response.raise_for_status()
+                received = 0
+                for chunk in response.iter_bytes():
+                    received += len(chunk)
+                    if received >= PROBE_BYTES:
+                        break
+        except httpx.HTTPError as e:
+            logger.info(f"Mirror {mirror_host(url)} unavailable: {e}")
+            return {"latency": None, "bytes_per_second": 0.0, "measured_at": time.time()}
+
+        elapsed = time.monotonic() - started
+        bytes_per_second = received / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            f"Mirror {mirror_host(url)}: {latency * 1000:.0f} ms, {bytes_per_second / 1024 / 1024:.1f} MB/s"
+        )
+        return {
+            "latency": latency,
+            "bytes_per_second": bytes_per_second,
+            "measured_at": time.time(),
+        }
+
+    def rank(self, http_client: httpx.Client, urls: list) -> list:
+        """Return ``urls`` ordered fastest first, probing only mirrors without a fresh measurement."""
+        state = self._load()
+        now = time.time()
+        stale = [
+            url
+            for url in urls
+            if now - state.get(mirror_host(url), {}).get("measured_at", 0) > self.ttl
+        ]
+        if stale:
+            with ThreadPoolExecutor(max_workers=len(stale)) as executor:
+                for url, result in zip(
+                    stale, executor.map(lambda u: self.probe(http_client, u), stale)
+                ):
+                    state[mirror_host(url)] = result
+            self._save(state)
+
+        def score(url):
+            entry = state.get(mirror_host(url), {})
+            latency = entry.get("latency")
+            return (-entry.get("bytes_per_second", 0.0), latency if latency is not None else float("inf"))
+
+        return sorted(urls, key=score)
+
+
+def mirrored_download(
+    http_client: httpx.Client,
+    urls: list,
+    destination: Path,
+    download_fn: Callable[[str, Path], str],
+    selector: Optional[MirrorSelector] = None,
+) -> str:
+    """
+    Download from the best mirror, failing over to the next one on error.
+
+    ``download_fn(url, destination)`` must resume from ``destination``'s
+    ``.part`` state, so bytes fetched from a failed mirror are kept and the
+    next mirror continues where it stopped. Returns the SHA-256 from
+    ``download_fn``.
+    """
+    ranked = selector.rank(http_client, urls) if selector and len(urls) > 1 else list(urls)
+    errors = []
+    for url in ranked:
+        started = time.monotonic()
+        try:
+            digest = download_fn(url, destination)
+        except (httpx.HTTPError, download.DownloadError) as e:
+            logger.warning(f"Download from {mirror_host(url)} failed ({e}), trying next mirror")
+            errors.append(f"{url}: {e}")
+            if selector:
+                selector.record(url, None, 0.0)
+            continue
+
+        elapsed = time.monotonic() - started
+        if selector and elapsed > 0:
+            selector.record(url, None, Path(destination).stat().st_size / elapsed)
+        return digest
+
+    raise download.DownloadError("All mirrors failed:\n" + "\n".join(errors))
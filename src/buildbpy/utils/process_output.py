@@ -0,0 +1,164 @@
+"""
+Subprocess output pump with batched logging and build progress parsing.
+"""
+
+import logging
+import queue
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Optional
+
+from .logs import OUTPUT_LOGGER
+
+logger = logging.getLogger(__name__)
+output_logger = logging.getLogger(OUTPUT_LOGGER)
+
+# ninja prints "[123/4567] Building CXX object ...", CMake's Makefiles "[ 42%] Building ..."
+NINJA_PROGRESS = re.compile(r"^\[\s*(\d+)/(\d+)\]")
+MAKE_PROGRESS = re.compile(r"^\[\s*(\d+)%\]")
+
+BATCH_LINES = 500
+FLUSH_INTERVAL = 0.5
+PROGRESS_INTERVAL = 15.0
+STDERR_TAIL = 200
+
+ProgressCallback = Optional[Callable[[float, Optional[float]], None]]
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
+
+
+class ProgressTracker:
+    """
+    Turn ninja ``[n/m]`` and make ``[ p%]`` markers into a percentage and ETA.
+
+    The ETA extrapolates the rate since the first marker seen, so time spent
+    configuring before the compile starts does not skew it.
+    """
+
+    def __init__(self, interval: float = PROGRESS_INTERVAL, callback: ProgressCallback = None):
+        self.interval = interval
+        self.callback = callback
+        self.percent: Optional[float] = None
+        self.eta: Optional[float] = None
+        self._first: Optional[tuple[float, float]] = None
+        self._last_report = 0.0
+
+    def update(self, line: str) -> bool:
+        """Parse ``line``; return True if it carried a progress marker."""
+        match = NINJA_PROGRESS.match(line)
+        if match:
+            done, total = int(match.group(1)), int(match.group(2))
+            percent = done / total * 100 if total else 0.0
+        else:
+            match = MAKE_PROGRESS.match(line)
+            if not match:
+                return False
+            percent = float(match.group(1))
+
+        now = time.monotonic()
+        if self._first is None:
+            self._first = (now, percent)
+        start, start_percent = self._first
+        if percent > start_percent and percent < 100:
+            rate = (percent - start_percent) / (now - start)
+            self.eta = (100 - percent) / rate if rate > 0 else None
+        self.percent = percent
+
+        if self.callback:
+            self.callback(percent, self.eta)
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            eta = f", ETA {format_duration(self.eta)}" if self.eta is not None else ""
+            logger.info(f"Build progress: {percent:.1f}%{eta}")
+        return True
+
+
+def _reader(stream, name: str, lines: queue.Queue):
+    for line in iter(stream.readline, ""):
+        lines.put((name, line.rstrip("\n")))
+    stream.close()
+    lines.put((name, None))
+
+
+def run_streaming(
+    command: str,
+    cwd: Path,
+    log: logging.Logger = output_logger,
+    progress: ProgressCallback = None,
+) -> tuple[int, str]:
+    """
+    Run a shell command, draining stdout and stderr concurrently.
+
+    One reader thread per stream feeds a queue, so neither pipe can fill up
+    and block the child. Lines are logged in batches of up to
+    ``BATCH_LINES`` or every ``FLUSH_INTERVAL`` seconds (stdout at INFO,
+    stderr at WARNING) to ``log``, and progress markers are reported
+    periodically through this module's logger.
+
+    :return: The return code and the last ``STDERR_TAIL`` stderr lines.
+    """
+    process = subprocess.Popen(
+        command,
+        cwd=cwd,
+        shell=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+    )
+    lines = queue.Queue()
+    readers = [
+        threading.Thread(target=_reader, args=(process.stdout, "stdout", lines), daemon=True),
+        threading.Thread(target=_reader, args=(process.stderr, "stderr", lines), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    tracker = ProgressTracker(callback=progress)
+    batches = {"stdout": [], "stderr": []}
+    stderr_tail = deque(maxlen=STDERR_TAIL)
+    last_flush = time.monotonic()
+
+    def flush():
+        if batches["stdout"]:
+            log.info("\n".join(batches["stdout"]))
+            batches["stdout"].clear()
+        if batches["stderr"]:
+            log.warning("\n".join(batches["stderr"]))
+            batches["stderr"].clear()
+
+    open_streams = len(readers)
+    while open_streams:
+        try:
+            name, line = lines.get(timeout=FLUSH_INTERVAL)
+        except queue.Empty:
+            name = None
+        else:
+            if line is None:
+                open_streams -= 1
+            elif line.strip():
+                batches[name].append(line)
+                if name == "stderr":
+                    stderr_tail.append(line)
+                else:
+                    tracker.update(line)
+
+        now = time.monotonic()
+        if (
+            name is None
+            or now - last_flush >= FLUSH_INTERVAL
+            or len(batches["stdout"]) + len(batches["stderr"]) >= BATCH_LINES
+        ):
+            flush()
+            last_flush = now
+    flush()
+
+    return process.wait(), "\n".join(stderr_tail)
@@ -0,0 +1,185 @@
+"""
+Shared HTTP transport: pooled httpx clients with retries and per-host counters.
+"""
+
+import importlib.util
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"})
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+DEFAULT_TIMEOUT = httpx.Timeout(60.0, connect=30.0)
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("BUILDBPY_MAX_CONNECTIONS", "32")),
+    max_keepalive_connections=16,
+    keepalive_expiry=30.0,
+)
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+
+
+class HostStats:
+    """Thread-safe per-host request, retry, byte and latency counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _host(self, host: str) -> dict:
+        return self._hosts.setdefault(
+            host, {"requests": 0, "retries": 0, "bytes": 0, "latency": 0.0}
+        )
+
+    def record_request(self, host: str, latency: float):
+        with self._lock:
+            entry = self._host(host)
+            entry["requests"] += 1
+            entry["latency"] += latency
+
+    def record_retry(self, host: str):
+        with self._lock:
+            self._host(host)["retries"] += 1
+
+    def record_bytes(self, host: str, count: int):
+        with self._lock:
+            self._host(host)["bytes"] += count
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {host: dict(entry) for host, entry in self._hosts.items()}
+
+    def log_report(self, log=logger.info):
+        """Write a per-host summary table through ``log``."""
+        hosts = self.snapshot()
+        if not hosts:
+            return
+        log(f"{'host':<32} {'requests':>8} {'retries':>7} {'MB':>9} {'avg ms':>8}")
+        for host, entry in sorted(hosts.items()):
+            average = entry["latency"] / entry["requests"] * 1000 if entry["requests"] else 0.0
+            log(
+                f"{host:<32} {entry['requests']:>8} {entry['retries']:>7} "
+                f"{entry['bytes'] / 1024 / 1024:>9.1f} {average:>8.0f}"
+            )
+
+
+# Counters shared by every client created through this module
+stats = HostStats()
+
+
+def _retry_delay(attempt: int, backoff: float, response: Optional[httpx.Response] = None) -> float:
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return backoff * 2**attempt
+
+
+class _CountingStream(httpx.SyncByteStream):
+    def __init__(self, stream, host: str, host_stats: HostStats):
+        self._stream = stream
+        self._host = host
+        self._stats = host_stats
+
+    def __iter__(self):
+        for chunk in self._stream:
+            self._stats.record_bytes(self._host, len(chunk))
+            yield chunk
+
+    def close(self):
+        self._stream.close()
+
+
+def _counted(response: httpx.Response, stream) -> httpx.Response:
+    return httpx.Response(
+        status_code=response.status_code,
+        headers=response.headers,
+        stream=stream,
+        extensions=response.extensions,
+    )
+
+
+class RetryTransport(httpx.BaseTransport):
+    """
+    Wrap a transport with retries for idempotent requests and per-host counters.
+
+    Connection errors and 429/5xx responses are retried with exponential
+    backoff (honouring ``Retry-After``). Non-idempotent requests such as
+    uploads are sent once.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        host_stats: HostStats = stats,
+    ):
+        self.transport = transport
+        self.retries = retries
+        self.backoff = backoff
+        self.stats = host_stats
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        retries = self.retries if request.method in IDEMPOTENT_METHODS else 0
+        for attempt in range(retries + 1):
+            started = time.monotonic()
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError as e:
+                if attempt == retries:
+                    raise
+                delay = _retry_delay(attempt, self.backoff)
+                logger.warning(f"{request.method} {request.url} failed ({e}), retrying in {delay:.1f}s")
+            else:
+                self.stats.record_request(host, time.monotonic() - started)
+                if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+                    return _counted(response, _CountingStream(response.stream, host, self.stats))
+                response.close()
+                delay = _retry_delay(attempt, self.backoff, response)
+                logger.warning(
+                    f"{request.method} {request.url} returned {response.status_code}, retrying in {delay:.1f}s"
+                )
+            self.stats.record_retry(host)
+            time.sleep(delay)
+
+    def close(self):
+        self.transport.close()
+
+
+def _http2_available(http2: bool) -> bool:
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+        return False
+    return http2
+
+
+def create_client(
+    http2: bool = os.getenv("BUILDBPY_HTTP2") == "1",
+    limits: httpx.Limits = DEFAULT_LIMITS,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+    timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+    **kwargs,
+) -> httpx.Client:
+    """
+    Return a pooled keep-alive ``httpx.Client`` with retries and per-host counters.
+
+    HTTP/2 is used when requested (``BUILDBPY_HTTP2=1``) and ``h2`` is installed.
+    Extra keyword arguments are passed to ``httpx.Client``.
+    """
+    transport = httpx.HTTPTransport(http2=_http2_available(http2), limits=limits)
+    kwargs.setdefault("follow_redirects", True)
+    return httpx.Client(
+        transport=RetryTransport(transport, retries, backoff),
+        timeout=timeout,
+        **kwargs,
+    )
+
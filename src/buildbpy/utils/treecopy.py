@@ -0,0 +1,186 @@
+"""
+Tree copies that clone, hardlink or copy files on a thread pool.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import shutil
+import stat
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# ioctl(dest_fd, FICLONE, src_fd) from linux/fs.h, supported on btrfs, xfs and bcachefs
+FICLONE = 0x40049409
+
+# Errors meaning "this method cannot work between these two paths", as opposed to a real failure
+UNSUPPORTED_ERRNOS = frozenset(
+    {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.ENOSYS, errno.EPERM}
+)
+
+
+def del_readonly(action, name, exc):
+    """``shutil.rmtree`` error handler that clears the read-only bit and retries (Windows)."""
+    os.chmod(name, stat.S_IWRITE)
+    os.remove(name)
+
+
+def tree_size(path: Path) -> int:
+    """Total size in bytes of the files under ``path``, not following symlinks."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _reflink(source: Path, destination: Path):
+    if sys.platform.startswith("linux"):
+        import fcntl
+
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            except OSError:
+                dst.close()
+                os.unlink(destination)
+                raise
+        shutil.copystat(source, destination)
+    elif sys.platform == "darwin":
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        # clonefile(2) copies the metadata along with the data
+        if libc.clonefile(os.fsencode(source), os.fsencode(destination), 0) != 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), str(source))
+    else:
+        raise OSError(errno.EOPNOTSUPP, "Copy-on-write clones are not supported here")
+
+
+class TreeCopier:
+    """
+    Copy files and trees with the cheapest method the filesystem allows.
+
+    Each file is first cloned copy-on-write (``FICLONE`` on Linux,
+    ``clonefile`` on macOS), then hardlinked if ``hardlink`` is set, then
+    copied with ``shutil.copy2``. A method that fails because the two paths
+    are on different or unsupported filesystems is not tried again by this
+    copier. Hardlinks share the file with the source, so only enable them
+    when neither side is modified in place afterwards.
+    """
+
+    def __init__(
+        self,
+        reflink: bool = True,
+        hardlink: bool = False,
+        workers: Optional[int] = None,
+    ):
+        self.methods = [
+            method
+            for method, enabled in (("reflink", reflink), ("hardlink", hardlink), ("copy", True))
+            if enabled
+        ]
+        self.workers = workers
+        self.counts = {method: 0 for method in self.methods}
+        self._lock = threading.Lock()
+
+    def _disable(self, method: str, error: OSError):
+        with self._lock:
+            if method in self.methods:
+                logger.debug(f"Not using {method} for this copy: {error}")
+                self.methods.remove(method)
+
+    def copy_file(self, source: Path, destination: Path) -> str:
+        """Copy one file, replacing ``destination``; returns the method used."""
+        if os.path.lexists(destination):
+            os.unlink(destination)
+        for method in list(self.methods):
+            try:
+                if method == "reflink":
+                    _reflink(source, destination)
+                elif method == "hardlink":
+                    os.link(source, destination)
+                else:
+                    shutil.copy2(source, destination)
+            except OSError as e:
+                if method == "copy" or e.errno not in UNSUPPORTED_ERRNOS:
+                    raise
+                self._disable(method, e)
+                continue
+            with self._lock:
+                self.counts[method] += 1
+            return method
+
+    def _plan(self, source, destination, ignore, symlinks, dirs, files, links):
+        with os.scandir(source) as it:
+            entries = list(it)
+        ignored = set(ignore(os.fspath(source), [e.name for e in entries])) if ignore else set()
+        dirs.append((source, destination))
+        for entry in entries:
+            if entry.name in ignored:
+                continue
+            src = Path(entry.path)
+            dst = destination / entry.name
+            if entry.is_symlink():
+                if symlinks:
+                    links.append((src, dst))
+                    continue
+                if not src.exists():
+                    logger.warning(f"Skipping dangling symlink {src}")
+                    continue
+            if src.is_dir():
+                self._plan(src, dst, ignore, symlinks, dirs, files, links)
+            else:
+                files.append((src, dst))
+
+    def copy_tree(
+        self,
+        source: Path,
+        destination: Path,
+        ignore: Optional[Callable[[str, list], list]] = None,
+        symlinks: bool = False,
+    ):
+        """
+        Copy ``source`` into ``destination`` like ``shutil.copytree(dirs_exist_ok=True)``.
+
+        ``ignore`` and ``symlinks`` behave as in ``shutil.copytree``: with
+        ``symlinks=False`` links are followed and their targets copied. The
+        tree is listed first, directories are created, then the files are
+        copied on a thread pool.
+        """
+        dirs, files, links = [], [], []
+        self._plan(Path(source), Path(destination), ignore, symlinks, dirs, files, links)
+
+        for _, dst in dirs:
+            dst.mkdir(parents=True, exist_ok=True)
+        for src, dst in links:
+            if os.path.lexists(dst):
+                os.unlink(dst)
+            os.symlink(os.readlink(src), dst)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for _ in executor.map(lambda item: self.copy_file(*item), files):
+                pass
+
+        # Deepest first, so creating files no longer touches the copied mtimes
+        for src, dst in reversed(dirs):
+            try:
+                shutil.copystat(src, dst)
+            except OSError:
+                pass
+
+        logger.info(
+            f"Copied {len(files)} files from {source} to {destination} ("
+            + ", ".join(f"{method}: {count}" for method, count in self.counts.items() if count)
+            + ")"
+        )
+
@@ -0,0 +1,100 @@
+"""
+Pool of git worktrees sharing one Blender object store.
+"""
+
+import logging
+import os
+import subprocess
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SOURCE_DIR_NAME = "blender"
+
+
+class WorktreeBusyError(Exception):
+    """Raised when another process is building in the requested worktree."""
+
+
+def _try_lock(file):
+    if os.name == "nt":
+        import msvcrt
+
+        msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+    else:
+        import fcntl
+
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+class WorktreePool:
+    """
+    One git worktree per build line, created on demand next to the primary repository.
+
+    Worktrees live in ``<pool_dir>/<name>/blender`` so Blender's make places
+    each build directory (``../build_<platform>_bpy``) inside its own pool
+    entry. All worktrees share the primary repository's objects, so a tag
+    fetched for one is available to every other without another download.
+    A worktree is held through a lock file while in use; the lock is released
+    by the OS if the build process dies.
+    """
+
+    def __init__(self, repo_dir: Path, pool_dir: Path):
+        self.repo_dir = Path(repo_dir)
+        self.pool_dir = Path(pool_dir).resolve()
+        self._locks = {}
+
+    def run_git(self, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            ["git", *args], cwd=self.repo_dir, capture_output=True, text=True
+        )
+
+    def entry_dir(self, name: str) -> Path:
+        """Pool entry of worktree ``name``; per-build outputs here are covered by its lock."""
+        return self.pool_dir / name
+
+    def source_dir(self, name: str) -> Path:
+        return self.entry_dir(name) / SOURCE_DIR_NAME
+
+    def acquire(self, name: str, revision: str) -> Path:
+        """
+        Lock the worktree ``name`` and return its source directory.
+
+        A missing worktree is added detached at ``revision``, which must
+        already be present in the primary repository. An existing one is
+        returned as is; the caller checks out the target inside it.
+        """
+        self.pool_dir.joinpath(name).mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.pool_dir / name / ".lock", "a+")
+        try:
+            _try_lock(lock_file)
+        except OSError:
+            lock_file.close()
+            raise WorktreeBusyError(f"Worktree {name} is in use by another build")
+        self._locks[name] = lock_file
+
+        source_dir = self.source_dir(name)
+        if not (source_dir / ".git").exists():
+            # Drop registrations of worktrees whose directories were deleted
+            self.run_git("worktree", "prune")
+            logger.info(f"Adding worktree {source_dir} at {revision}")
+            result = self.run_git("worktree", "add", "--detach", str(source_dir), revision)
+            if result.returncode != 0:
+                self.release(name)
+                raise Exception(f"Failed to add worktree {name}: {result.stderr}")
+        else:
+            logger.info(f"Reusing worktree {source_dir}")
+        return source_dir
+
+    def release(self, name: str):
+        lock_file = self._locks.pop(name, None)
+        if lock_file is not None:
+            lock_file.close()
+
+    @contextmanager
+    def worktree(self, name: str, revision: str):
+        try:
+            yield self.acquire(name, revision)
+        finally:
+            self.release(name)
@@ -0,0 +1,154 @@
+import errno
+import os
+import shutil
+
+import pytest
+
+from buildbpy.utils import treecopy
+
+
+def unsupported(*args, **kwargs):
+    raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+
+@pytest.fixture
+def no_reflink(monkeypatch):
+    calls = []
+
+    def reflink(source, destination):
+        calls.append(source)
+        unsupported()
+
+    monkeypatch.setattr(treecopy, "_reflink", reflink)
+    return calls
+
+
+@pytest.fixture
+def source_tree(tmp_path):
+    source = tmp_path / "source"
+    (source / "sub" / "deeper").mkdir(parents=True)
+    (source / "a.txt").write_text("a")
+    (source / "sub" / "b.txt").write_text("b")
+    (source / "sub" / "deeper" / "c.py").write_text("c")
+    (source / "sub" / "skip.pyc").write_text("compiled")
+    return source
+
+
+def test_reflink_is_tried_first(tmp_path, monkeypatch):
+    monkeypatch.setattr(treecopy, "_reflink", shutil.copy2)
+    source = tmp_path / "file"
+    source.write_text("data")
+
+    copier = treecopy.TreeCopier(hardlink=True)
+
+    assert copier.copy_file(source, tmp_path / "copy") == "reflink"
+    assert (tmp_path / "copy").read_text() == "data"
+
+
+def test_falls_back_to_hardlink(tmp_path, no_reflink):
+    source = tmp_path / "file"
+    source.write_text("data")
+
+    method = treecopy.TreeCopier(hardlink=True).copy_file(source, tmp_path / "copy")
+
+    assert method == "hardlink"
+    assert os.path.samefile(source, tmp_path / "copy")
+
+
+def test_falls_back_to_copy(tmp_path, no_reflink, monkeypatch):
+    monkeypatch.setattr(treecopy.os, "link", unsupported)
+    source = tmp_path / "file"
+    source.write_text("data")
+
+    method = treecopy.TreeCopier(hardlink=True).copy_file(source, tmp_path / "copy")
+
+    assert method == "copy"
+    assert (tmp_path / "copy").read_text() == "data"
+    assert not os.path.samefile(source, tmp_path / "copy")
+
+
+def test_hardlink_is_opt_in(tmp_path, no_reflink):
+    source = tmp_path / "file"
+    source.write_text("data")
+
+    assert treecopy.TreeCopier().copy_file(source, tmp_path / "copy") == "copy"
+
+
+def test_unsupported_method_is_disabled(source_tree, tmp_path, no_reflink):
+    copier = treecopy.TreeCopier(workers=1)
+
+    copier.copy_tree(source_tree, tmp_path / "copy")
+
+    assert len(no_reflink) == 1
+    assert copier.methods == ["copy"]
+    assert copier.counts["copy"] == 4
+
+
+def test_other_errors_are_raised(tmp_path, monkeypatch):
+    def denied(source, destination):
+        raise OSError(errno.EACCES, "Permission denied")
+
+    monkeypatch.setattr(treecopy, "_reflink", denied)
+    source = tmp_path / "file"
+    source.write_text("data")
+    copier = treecopy.TreeCopier()
+
+    with pytest.raises(PermissionError):
+        copier.copy_file(source, tmp_path / "copy")
+    assert "reflink" in copier.methods
+
+
+def test_copy_tree_matches_source(source_tree, tmp_path):
+    destination = tmp_path / "copy"
+
+    treecopy.TreeCopier().copy_tree(source_tree, destination)
+
+    copied = sorted(p.relative_to(destination) for p in destination.rglob("*"))
+    assert copied == sorted(p.relative_to(source_tree) for p in source_tree.rglob("*"))
+    assert (destination / "sub" / "deeper" / "c.py").read_text() == "c"
+
+
+def test_ignore(source_tree, tmp_path):
+    destination = tmp_path / "copy"
+
+    treecopy.TreeCopier().copy_tree(
+        source_tree, destination, ignore=shutil.ignore_patterns("*.pyc", "deeper")
+    )
+
+    assert (destination / "sub" / "b.txt").exists()
+    assert not (destination / "sub" / "skip.pyc").exists()
+    assert not (destination / "sub" / "deeper").exists()
+
+
+def test_dangling_symlink_is_skipped(source_tree, tmp_path):
+    (source_tree / "dangling").symlink_to(source_tree / "missing")
+    (source_tree / "link.txt").symlink_to("a.txt")
+    destination = tmp_path / "copy"
+
+    treecopy.TreeCopier().copy_tree(source_tree, destination)
+
+    assert not os.path.lexists(destination / "dangling")
+    assert not (destination / "link.txt").is_symlink()
+    assert (destination / "link.txt").read_text() == "a"
+
+
+def test_symlinks_are_kept(source_tree, tmp_path):
+    (source_tree / "dangling").symlink_to("missing")
+    (source_tree / "link.txt").symlink_to("a.txt")
+    destination = tmp_path / "copy"
+
+    treecopy.TreeCopier().copy_tree(source_tree, destination, symlinks=True)
+
+    assert os.readlink(destination / "dangling") == "missing"
+    assert os.readlink(destination / "link.txt") == "a.txt"
+
+
+def test_existing_destination_is_replaced(tmp_path):
+    source = tmp_path / "file"
+    source.write_text("new")
+    destination = tmp_path / "copy"
+    destination.write_text("old")
+
+    treecopy.TreeCopier().copy_file(source, destination)
+
+    assert destination.read_text() == "new"
@@ -1,14 +1,17 @@
-import requests
 import json
 import os
+import httpx
+
+# One keep-alive client for both API calls, retrying failed connections
+http_client = httpx.Client(transport=httpx.HTTPTransport(retries=3), follow_redirects=True, timeout=30.0)
 
 def get_latest_tag():
-    response = requests.get('https://api.github.com/repos/blender/blender/tags')
+    response = http_client.get('https://api.github.com/repos/blender/blender/tags')
     tags = response.json()
     return tags[0]['name'] if tags else None
 
 def get_latest_commit():
-    response = requests.get('https://api.github.com/repos/blender/blender/commits/main')
+    response = http_client.get('https://api.github.com/repos/blender/blender/commits/main')
     commit = response.json()
     return commit['sha'] if commit else None
 
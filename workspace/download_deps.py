@@ -1,4 +1,6 @@
 import re
+import os
+import json
 import httpx
 import typer
 import asyncio
@@ -7,199 +9,489 @@ from pathlib import Path
 import aioftp
 import urllib
 import shutil
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from collections import deque
 
 app = typer.Typer()
 
+CHUNK_SIZE = 1024 * 1024
+RETRY_BACKOFF = 1.0
+MANIFEST_NAME = 'deps.lock.json'
+GOOD_STATUSES = ('ok', 'cached', 'verified')
+DEFAULT_CACHE_DIR = Path.home() / '.buildbpy' / 'deps-cache'
+# Bump when the resolver output changes so cached tables are rebuilt
+RESOLVER_VERSION = '1'
+VARIABLE_REF = r'\$\{([A-Za-z0-9_]+)\}'
+# Upstream hosts that are unreliable for automated downloads, mapped to mirrors serving the same paths
+URI_REWRITES = {
+    'https://gmplib.org/download/gmp/': 'https://ftp.gnu.org/gnu/gmp/',
+}
+
 def get_hash_func(hash_type: str):
     return md5 if hash_type.lower() == 'md5' else sha256
 
 
-def parse_cmake_file(file_path):
-    with open(file_path, 'r') as file:
-        content = file.read()
-
-    # Extract all set commands
-    set_commands = re.findall(r'set\((.*?)\)', content, re.DOTALL)
+def parse_set_commands(content: str) -> dict:
+    """Return {variable: raw value} for every set() in a CMake file; later sets win, as in CMake."""
+    content = '\n'.join(line for line in content.splitlines() if not line.lstrip().startswith('#'))
+    variables = {}
+    for command in re.findall(r'set\((.*?)\)', content, re.DOTALL):
+        match = re.match(r'\s*(\S+)\s+("(?:[^"\\]|\\.)*"|\S+)', command)
+        if match:
+            variables[match.group(1)] = match.group(2).strip('"')
+    return variables
+
+
+def resolve_variables(variables: dict):
+    """
+    Expand ${...} references by resolving the variable dependency graph in topological order.
+
+    Returns (resolved, unresolved) where unresolved maps each variable to the references
+    that could not be expanded (undefined or part of a cycle); those are left verbatim.
+    """
+    graph = {name: set(re.findall(VARIABLE_REF, value)) & variables.keys() for name, value in variables.items()}
+    dependents = {name: set() for name in variables}
+    for name, refs in graph.items():
+        for ref in refs:
+            dependents[ref].add(name)
+
+    # Kahn's algorithm; whatever is left over sits on or behind a cycle
+    pending = {name: len(refs) for name, refs in graph.items()}
+    ready = deque(name for name, count in pending.items() if count == 0)
+    order = []
+    while ready:
+        name = ready.popleft()
+        order.append(name)
+        for dependent in dependents[name]:
+            pending[dependent] -= 1
+            if pending[dependent] == 0:
+                ready.append(dependent)
+    cyclic = [name for name in variables if pending[name] > 0]
+    if cyclic:
+        typer.echo(f"Warning: CMake variables on or behind a reference cycle: {', '.join(cyclic)}")
+
+    resolved = {}
+    for name in order:
+        resolved[name] = re.sub(VARIABLE_REF, lambda m: resolved.get(m.group(1), m.group(0)), variables[name])
+    acyclic = dict(resolved)
+    for name in cyclic:
+        resolved[name] = re.sub(VARIABLE_REF, lambda m: acyclic.get(m.group(1), m.group(0)), variables[name])
+
+    unresolved = {}
+    for name, value in resolved.items():
+        missing = sorted(set(re.findall(VARIABLE_REF, value)))
+        if missing:
+            unresolved[name] = missing
+    return resolved, unresolved
+
+
+def group_libraries_by_prefix(variables: dict, resolved: dict) -> dict:
+    """Group variables into libraries; a library starts at its first *_VERSION or *_YEAR variable."""
+
+    def is_new_library(name, value):
+        return (("VERSION" in name) or ("YEAR" in name)) and ("NODOTS" not in name + value) and ("SHORT" not in name + value)
 
-    # Create a dictionary to store the libraries
     libraries = {}
     current_lib = None
-
-    def is_new_library(command):
-        # typer.echo(f"checking command: {command}")
-        # return ("VERSION" in command) and  ("${" not in command) and ("." in command) and ("NODOTS" not in command) and ("SHORT" not in command)
-        parts = command.split()
-        return (("VERSION" in parts[0]) or ("YEAR" in parts[0] )) and ("NODOTS" not in command) and ("SHORT" not in command)
-
-
-    for command in set_commands:
-        # Split the command into variable name and value
-        parts = command.split()
-        if len(parts) < 2:
-            continue
-        lib_name = None
-        variable_name = parts[0]
-        # variable_value = ' '.join(parts[1:]).strip('"')
-        variable_value = parts[1]
-        if is_new_library(command):
-            
-
-            version = parts[1]
-
-            # Extract the library name from the variable name
-            lib_name = '_'.join(variable_name.split('_')[:-1])
-            typer.echo(f"new library: {lib_name}, version: {version}")
-
-        # If a new library is encountered, update current_lib
-        if lib_name and lib_name != current_lib:
-            current_lib = lib_name
-            libraries[current_lib] = {}
-
-        # If there is a current library, add the property to it
+    for name, value in variables.items():
+        if is_new_library(name, value):
+            lib_name = '_'.join(name.split('_')[:-1])
+            if lib_name != current_lib:
+                current_lib = lib_name
+                libraries[current_lib] = {}
         if current_lib:
-            libraries[current_lib][variable_name.replace(f'{current_lib}_', '')] = variable_value
-        # Replace placeholders in the URI or FILE for each library
-    for lib_name, properties in libraries.items():
-        for prop_name, prop_value in properties.items():
-            # typer.echo(f"prop_name: {prop_name}\nprop_value: {prop_value}\nlib_name: {lib_name}\n\n")
-            if 'URI' in prop_name or 'FILE' or 'YEAR' in prop_name:
-                
-                # Find all placeholders in the URI or FILE
-                placeholders = re.findall(r'\${(.*?)}', prop_value)
-                # typer.echo(f"placeholders: {placeholders}")
-                for i in range(0, 2):
-                    for placeholder in placeholders:
-                        # Check if the placeholder exists in the library's properties
-                        placeholder_without_library = placeholder.replace(f'{lib_name}_', '')
-                        placeholder_without_version = placeholder.replace(f'_VERSION', '')
-                        # typer.echo(f"placeholder_without_library: {placeholder_without_library}")
-                        if placeholder_without_library in libraries[lib_name]:
-
-
-
-
-                            # Replace the placeholder with the value from the same library
-                            old_prop_value = prop_value
-                            prop_value = prop_value.replace(f'${{{placeholder}}}', libraries[lib_name][placeholder_without_library])
-                            # typer.echo(f"old value: {old_prop_value} new prop_value: {prop_value}")
-                        elif placeholder_without_version in libraries:
-                            # Replace the placeholder with the value from the same library
-                            old_prop_value = prop_value
-                            prop_value = prop_value.replace(f'${{{placeholder}}}', libraries[placeholder_without_version]['VERSION'])
-                            typer.echo(f"old value: {old_prop_value} new prop_value: {prop_value}")
-                        else:
-                            print(f"Warning: Placeholder {placeholder} not found in properties of {lib_name}.")
-                    
-                properties[prop_name] = prop_value
-    
-    for lib_name, properties in libraries.items():
-        version = properties.get('VERSION')
-        if version and version.startswith('${') and version.endswith('}'):
-            # typer.echo(f"found version: {version}")
-            parent_lib_name = version[2:-1].replace("_VERSION", "")  # Extract parent library name
-            parent_lib = libraries.get(parent_lib_name)
-            # typer.echo(f"parent_lib: {parent_lib_name}")
-            if parent_lib:
-                parent_version = parent_lib.get('VERSION')
-                if parent_version:
-                    # Replace placeholders in URI and FILE
-                    properties['URI'] = properties['URI'].replace(version, parent_version)
-                    properties['FILE'] = properties['FILE'].replace(version, parent_version)
-                    typer.echo(f"Replacing {version} with {parent_version} in {lib_name}")
-
-    # handle special cases
-    libraries['GMP']['URI'] = "https://ftp.gnu.org/gnu/gmp/gmp-6.2.1.tar.xz"
-    # libraries['TBB']['URI'] = "https://github.com/oneapi-src/oneTBB/archive/2020.tar.gz"
-    # libraries['TBB']['FILE'] = "oneTBB-2020_U3.tar.gz"
-
-    typer.echo(f"TBB: {libraries['TBB']}")
+            libraries[current_lib][name.replace(f'{current_lib}_', '')] = resolved[name]
+    return libraries
 
 
+def apply_uri_rewrites(libraries: dict):
+    for properties in libraries.values():
+        uri = properties.get('URI')
+        for prefix, replacement in URI_REWRITES.items():
+            if uri and uri.startswith(prefix):
+                properties['URI'] = replacement + uri[len(prefix):]
+
+
+def parse_cmake_file(file_path, cache_dir: Path = DEFAULT_CACHE_DIR):
+    """
+    Parse versions.cmake into {library: {VERSION, URI, FILE, HASH, HASH_TYPE, ...}}.
+
+    The resolved table is cached under cache_dir keyed by the SHA-256 of the file,
+    so an unchanged versions.cmake is never re-parsed.
+    """
+    with open(file_path, 'rb') as file:
+        raw = file.read()
+
+    cache_file = None
+    if cache_dir is not None:
+        digest = sha256(raw + RESOLVER_VERSION.encode()).hexdigest()
+        cache_file = Path(cache_dir) / f'versions-{digest}.json'
+        try:
+            with open(cache_file, 'r') as file:
+                return json.load(file)['libraries']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    variables = parse_set_commands(raw.decode())
+    resolved, unresolved = resolve_variables(variables)
+    for name, missing in unresolved.items():
+        typer.echo(f"Warning: unresolved references in {name}: {', '.join(missing)}")
+
+    libraries = group_libraries_by_prefix(variables, resolved)
+    apply_uri_rewrites(libraries)
+
+    if cache_file is not None:
+        export_libraries_json(libraries, cache_file, unresolved)
     return libraries
 
-async def download_file(client: httpx.AsyncClient, uri, destination: Path):
+
+def export_libraries_json(libraries: dict, output_path: Path, unresolved: dict = None):
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w') as file:
+        json.dump({'libraries': libraries, 'unresolved': unresolved or {}}, file, indent=2)
+
+
+class HostLimiter:
+    """Bound the number of downloads in flight overall and per host."""
+
+    def __init__(self, max_concurrency: int, per_host: int):
+        self.global_semaphore = asyncio.Semaphore(max_concurrency)
+        self.per_host = per_host
+        self.host_semaphores = {}
+
+    @asynccontextmanager
+    async def slot(self, uri: str):
+        host = urllib.parse.urlparse(uri).hostname
+        host_semaphore = self.host_semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with self.global_semaphore, host_semaphore:
+            yield
+
+
+class FtpPool:
+    """
+    Reuse logged-in FTP control connections per (host, port).
+
+    An FTP control connection carries one transfer at a time, so up to
+    per_host clients are kept per server and handed out to one download each.
+    """
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self.idle = {}
+        self.semaphores = {}
+
+    @asynccontextmanager
+    async def client(self, host: str, port: int):
+        key = (host, port)
+        semaphore = self.semaphores.setdefault(key, asyncio.Semaphore(self.per_host))
+        async with semaphore:
+            idle = self.idle.setdefault(key, [])
+            if idle:
+                client = idle.pop()
+            else:
+                client = aioftp.Client()
+                await client.connect(host, port)
+                await client.login()
+            try:
+                yield client
+            except BaseException:
+                # The control connection may be in an unknown state, don't hand it out again
+                client.close()
+                raise
+            idle.append(client)
+
+    async def close(self):
+        for clients in self.idle.values():
+            for client in clients:
+                try:
+                    await client.quit()
+                except (aioftp.StatusCodeError, OSError):
+                    client.close()
+        self.idle.clear()
+
+
+async def download_file(client: httpx.AsyncClient, uri, destination: Path, ftp_pool: FtpPool = None):
+    # Stream into a .part file next to the destination so a failed transfer never leaves a
+    # truncated archive behind; the final rename stays within the directory and copies nothing
+    part = destination.with_name(destination.name + '.part')
     if uri.startswith('http'):
-        # uri.replace('http://', 'https://')
-        try: 
-            response = await client.get(uri)
-        except httpx.RequestError as e:
-            
-            typer.echo(f"Request Error downloading {uri}: {e}")
-            return False
-        except httpx.HTTPStatusError as e:
-            typer.echo(f"HTTP Status Error downloading {uri}: {e.response}")
-            return False
-        # if response.status_code in [301, 302]:
-        #     uri = response.headers['Location']
-        #     response = await client.get(uri)
-
-        # content_disposition = response.headers.get('Content-Disposition')
-        # if content_disposition:
-        #     filename = re.findall('filename=(.+)', content_disposition)[0]
-        # else:
-        #     filename = Path(uri).name
-
-
-        with open(destination, "wb") as file:
-            file.write(response.content)
-            
+        async with client.stream('GET', uri) as response:
+            response.raise_for_status()
+            with open(part, "wb") as file:
+                async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                    file.write(chunk)
+
     elif uri.startswith('ftp'):
         url = urllib.parse.urlparse(uri)
-        path = url.path
-        downloaded_file_name = Path(url.path).name
-        destination_dir = destination.parent
-       
-        async with aioftp.Client.context(url.hostname, url.port or 21) as client:
-            await client.download(path, destination_dir)
-            shutil.move(destination_dir / downloaded_file_name, destination)        
+        pool = ftp_pool or FtpPool(1)
+        try:
+            async with pool.client(url.hostname, url.port or 21) as ftp_client:
+                async with ftp_client.download_stream(url.path) as stream:
+                    with open(part, "wb") as file:
+                        async for block in stream.iter_by_block(CHUNK_SIZE):
+                            file.write(block)
+        finally:
+            if ftp_pool is None:
+                await pool.close()
     else:
         raise ValueError(f"Unsupported protocol in URI: {uri}")
 
+    part.replace(destination)
     return True
 
+
+async def download_with_retries(client: httpx.AsyncClient, uri, destination: Path, retries: int, ftp_pool: FtpPool = None):
+    """Download with exponential backoff; returns True on success."""
+    for attempt in range(retries + 1):
+        try:
+            return await download_file(client, uri, destination, ftp_pool)
+        except (httpx.HTTPError, aioftp.StatusCodeError, OSError) as e:
+            if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500 and e.response.status_code != 429:
+                typer.echo(f"HTTP Status Error downloading {uri}: {e.response}")
+                return False
+            if attempt == retries:
+                typer.echo(f"Error downloading {uri}: {e}")
+                return False
+            delay = RETRY_BACKOFF * 2 ** attempt + random.uniform(0, RETRY_BACKOFF)
+            typer.echo(f"Retrying {uri} in {delay:.1f}s after error: {e}")
+            await asyncio.sleep(delay)
+    return False
+
+
+def hash_file(file_path: Path, hash_type: str, chunk_size: int = CHUNK_SIZE) -> str:
+    """Hash a file in fixed-size chunks so large archives never sit in memory whole."""
+    hasher = get_hash_func(hash_type)()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
 def verify_file(file_path: Path, expected_hash: str, hash_type: str):
-    hash_func = get_hash_func(hash_type)
+    """Return (ok, digest) for file_path; digest is None if the file could not be read."""
     try:
-        with open(file_path, 'rb') as f:
-            file_hash = hash_func(f.read()).hexdigest()
-            
-        return { file_hash == expected_hash, file_hash }
-    except Exception as e:
+        file_hash = hash_file(file_path, hash_type)
+    except OSError as e:
         typer.echo(f"Error verifying {file_path}: {e}")
-        return { False, None }
+        return False, None
+    return file_hash == (expected_hash or '').lower(), file_hash
+
+
+class VerificationEngine:
+    """
+    Run verify_file on a worker pool so hashing overlaps with network I/O.
+
+    hashlib releases the GIL while hashing, so threads are the default; a
+    process pool can be used instead when many large archives finish at once.
+    """
+
+    def __init__(self, max_workers: int = None, use_processes: bool = False):
+        pool = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self.executor = pool(max_workers=max_workers)
+
+    async def verify(self, file_path: Path, expected_hash: str, hash_type: str):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, verify_file, file_path, expected_hash, hash_type)
+
+    def close(self):
+        self.executor.shutdown()
+
 
 @app.command()
-def download_deps(cmakelists_path: str, download_path: str):
+def download_deps(
+    cmakelists_path: str,
+    download_path: str,
+    max_concurrency: int = typer.Option(8, help="Maximum downloads in flight"),
+    per_host: int = typer.Option(4, help="Maximum downloads in flight per host"),
+    retries: int = typer.Option(3, help="Retries per library with exponential backoff"),
+    verify_processes: bool = typer.Option(False, help="Verify hashes on a process pool instead of threads"),
+    export_json: str = typer.Option(None, help="Write the resolved library table to this JSON file"),
+):
     libraries = parse_cmake_file(cmakelists_path)
-    asyncio.run(download_deps_async(libraries, download_path))
+    if export_json:
+        export_libraries_json(libraries, Path(export_json))
+    asyncio.run(download_deps_async(libraries, download_path, max_concurrency, per_host, retries, verify_processes))
+
+
+def load_manifest(download_dir: Path) -> dict:
+    try:
+        with open(download_dir / MANIFEST_NAME, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(download_dir: Path, manifest: dict):
+    tmp_path = download_dir / (MANIFEST_NAME + '.tmp')
+    with open(tmp_path, 'w') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    tmp_path.replace(download_dir / MANIFEST_NAME)
+
+
+def manifest_entry(properties: dict, destination: Path, digest: str) -> dict:
+    stat = destination.stat()
+    return {
+        'uri': properties.get('URI'),
+        'file': properties.get('FILE'),
+        'hash': properties.get('HASH'),
+        'hash_type': properties.get('HASH_TYPE', 'md5').lower(),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'digest': digest,
+    }
+
+
+def is_up_to_date(entry: dict, properties: dict, destination: Path) -> bool:
+    """A file is current if the manifest still describes the same library and the file has not changed on disk."""
+    if not entry:
+        return False
+    if (entry.get('uri'), entry.get('file'), entry.get('hash')) != (properties.get('URI'), properties.get('FILE'), properties.get('HASH')):
+        return False
+    try:
+        stat = destination.stat()
+    except OSError:
+        return False
+    return stat.st_size == entry.get('size') and stat.st_mtime_ns == entry.get('mtime_ns')
 
-async def download_deps_async(libraries: dict, download_path: str):
+
+def group_libraries(libraries: dict) -> list:
+    """Group libraries that resolve to the same URI or expected hash so each group is downloaded once."""
+    groups = []
+    group_by_key = {}
+    for lib_name, properties in libraries.items():
+        keys = [('uri', properties.get('URI')), ('hash', (properties.get('HASH') or '').lower())]
+        keys = [key for key in keys if key[1]]
+        group = next((group_by_key[key] for key in keys if key in group_by_key), None)
+        if group is None:
+            group = []
+            groups.append(group)
+        group.append((lib_name, properties))
+        for key in keys:
+            group_by_key.setdefault(key, group)
+    return groups
+
+
+def link_or_copy(source: Path, destination: Path):
+    destination.unlink(missing_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+async def download_library(client: httpx.AsyncClient, limiter: HostLimiter, verifier: VerificationEngine, lib_name: str, properties: dict, download_dir: Path, retries: int, manifest: dict, ftp_pool: FtpPool = None):
+    uri = properties.get('URI')
+    hash_value = properties.get('HASH')
+    hash_type = properties.get('HASH_TYPE', 'md5').lower()
+    filename = properties.get('FILE')
+    result = {'library': lib_name, 'bytes': 0, 'seconds': 0.0, 'status': 'skipped', 'digest': None}
+
+    if not (uri and filename):
+        return result
+
+    destination = download_dir / filename
+    entry = manifest.get(lib_name)
+    if is_up_to_date(entry, properties, destination):
+        result['status'] = 'cached'
+        result['digest'] = entry['digest']
+        return result
+
+    # A file that predates the manifest (or was touched) only needs re-hashing, not re-downloading.
+    # Libraries without a HASH have nothing to check against, so an existing file is kept as is.
+    if destination.exists():
+        is_hash_verified, hash = await verifier.verify(destination, hash_value, hash_type)
+        if hash is not None and (is_hash_verified or not hash_value):
+            result['status'] = 'verified' if hash_value else 'cached'
+            result['digest'] = hash
+            manifest[lib_name] = manifest_entry(properties, destination, hash)
+            return result
+
+    async with limiter.slot(uri):
+        typer.echo(f"Downloading {lib_name} from {uri} to {destination}")
+        start = time.monotonic()
+        downloaded = await download_with_retries(client, uri, destination, retries, ftp_pool)
+        result['seconds'] = time.monotonic() - start
+
+    if not downloaded:
+        typer.echo(f"Failed to download {lib_name}.")
+        result['status'] = 'failed'
+        return result
+
+    result['bytes'] = destination.stat().st_size
+    is_hash_verified, hash = await verifier.verify(destination, hash_value, hash_type)
+    result['digest'] = hash
+    if hash is not None and (is_hash_verified or not hash_value):
+        result['status'] = 'ok'
+        manifest[lib_name] = manifest_entry(properties, destination, hash)
+    else:
+        typer.echo(f"Verification failed for {filename}. expecting {hash_value} got {hash}")
+        result['status'] = 'bad hash'
+    return result
+
+
+async def download_group(client: httpx.AsyncClient, limiter: HostLimiter, verifier: VerificationEngine, members: list, download_dir: Path, retries: int, manifest: dict, ftp_pool: FtpPool = None):
+    """Download the first library of a group and share the file with the others."""
+    lib_name, properties = members[0]
+    result = await download_library(client, limiter, verifier, lib_name, properties, download_dir, retries, manifest, ftp_pool)
+    results = [result]
+    source = download_dir / properties['FILE'] if properties.get('FILE') else None
+
+    for other_name, other_properties in members[1:]:
+        shared = {'library': other_name, 'bytes': 0, 'seconds': 0.0, 'status': result['status'], 'digest': result['digest']}
+        if result['status'] in GOOD_STATUSES and other_properties.get('FILE'):
+            destination = download_dir / other_properties['FILE']
+            if destination != source and not is_up_to_date(manifest.get(other_name), other_properties, destination):
+                link_or_copy(source, destination)
+            manifest[other_name] = manifest_entry(other_properties, destination, result['digest'])
+            shared['status'] = 'shared'
+        results.append(shared)
+    return results
+
+
+def print_summary(results: list, elapsed: float):
+    typer.echo(f"\n{'library':<24} {'status':<10} {'MB':>9} {'seconds':>9} {'MB/s':>8}")
+    for result in sorted(results, key=lambda r: r['library']):
+        mb = result['bytes'] / 1024 / 1024
+        rate = mb / result['seconds'] if result['seconds'] else 0.0
+        typer.echo(f"{result['library']:<24} {result['status']:<10} {mb:>9.1f} {result['seconds']:>9.1f} {rate:>8.1f}")
+    total_mb = sum(r['bytes'] for r in results) / 1024 / 1024
+    rate = total_mb / elapsed if elapsed else 0.0
+    typer.echo(f"{'total':<24} {'':<10} {total_mb:>9.1f} {elapsed:>9.1f} {rate:>8.1f}")
+
+
+async def download_deps_async(libraries: dict, download_path: str, max_concurrency: int = 8, per_host: int = 4, retries: int = 3, verify_processes: bool = False):
     download_dir = Path(download_path)
     download_dir.mkdir(parents=True, exist_ok=True)
     
 
     # typer.echo(f"libraries: {libraries}")
     timeout = httpx.Timeout(60.0, connect=60.0)
+    limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+    limiter = HostLimiter(max_concurrency, per_host)
+    verifier = VerificationEngine(use_processes=verify_processes)
+    manifest = load_manifest(download_dir)
+    ftp_pool = FtpPool(per_host)
 
-    async with httpx.AsyncClient(follow_redirects=True, timeout=timeout) as client:
-        for lib_name, properties in libraries.items():
-            uri = properties.get('URI')
-            hash_value = properties.get('HASH')
-            hash_type = properties.get('HASH_TYPE', 'md5').lower()
-            filename = properties.get('FILE')
-
-            if uri and filename:
-                destination = download_dir / filename
-                typer.echo(f"Downloading {lib_name} from {uri} to {destination}")
-                if await download_file(client, uri, destination):
-                    is_hash_verified, hash = verify_file(destination, hash_value, hash_type)
-                    if is_hash_verified:
-                        pass
-                        # typer.echo(f"Verified {filename} successfully.")
-                    else:
-                        typer.echo(f"Verification failed for {filename}. expecting {hash_value} got {hash}")
-                else:
-                    typer.echo(f"Failed to download {lib_name}.")
+    start = time.monotonic()
+    try:
+        # Retries are handled per library so they also cover failures mid-body
+        async with httpx.AsyncClient(follow_redirects=True, timeout=timeout, limits=limits) as client:
+            group_results = await asyncio.gather(*(
+                download_group(client, limiter, verifier, members, download_dir, retries, manifest, ftp_pool)
+                for members in group_libraries(libraries)
+            ))
+    finally:
+        await ftp_pool.close()
+        verifier.close()
+        save_manifest(download_dir, manifest)
+
+    results = [result for group in group_results for result in group]
+    print_summary([r for r in results if r['status'] != 'skipped'], time.monotonic() - start)
+    return results
 
 if __name__ == "__main__":
     app()
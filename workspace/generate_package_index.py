@@ -2,20 +2,22 @@ from pathlib import Path
 import typer
 from github import Github
 import hashlib
-import requests
+import httpx
 from tempfile import NamedTemporaryFile
 
+# One keep-alive client for every wheel, retrying failed connections
+http_client = httpx.Client(transport=httpx.HTTPTransport(retries=3), follow_redirects=True, timeout=60.0)
+
 def compute_sha256(url):
     """Download a file and compute its SHA256 hash."""
-    response = requests.get(url, stream=True)
-    response.raise_for_status()
-    
     sha256_hash = hashlib.sha256()
-    with NamedTemporaryFile() as temp_file:
-        for chunk in response.iter_content(chunk_size=8192):
-            temp_file.write(chunk)
-            sha256_hash.update(chunk)
-        return sha256_hash.hexdigest()
+    with http_client.stream("GET", url) as response:
+        response.raise_for_status()
+        with NamedTemporaryFile() as temp_file:
+            for chunk in response.iter_bytes(chunk_size=8192):
+                temp_file.write(chunk)
+                sha256_hash.update(chunk)
+    return sha256_hash.hexdigest()
 
 def create_project_index_page(releases, project_name, docs_path):
     project_links = []